@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+import copy
+import importlib
+import io
+import os
+import sys
+import traceback
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible.utils.vars import merge_hash
+from ansible.vars.clean import remove_internal_keys
+
+display = Display()
+
+# Connections whose modules run on the controller anyway, in process by default
+IN_PROCESS_CONNECTIONS = ('local', 'httpapi')
+
+
+class ActionModule(ActionBase):
+    '''Action plugin for the BloxOne DDI modules.
+
+    The b1_* modules only talk to the BloxOne REST API, so instead of building
+    an AnsiballZ payload and starting a new interpreter for every task, the
+    module is imported and its main() run inside the controller worker. The
+    module_utils (and the pooled Request session) are then imported once per
+    worker process. This is the default for the tasks that would run on the
+    controller anyway, with the local or httpapi connection; set the
+    C(b1ddi_in_process) variable to true or false to choose for any task.
+    '''
+    _supports_check_mode = True
+    _supports_async = True
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        if self._in_process(task_vars):
+            module = self._find_load_module()
+            self._patch_update_module(module, task_vars)
+            display.vvvv('b1ddi: running %s in the controller process' % self._task.action, self._play_context.remote_addr)
+            return merge_hash(result, self._exec_module(module, self._task_environment()))
+
+        wrap_async = self._task.async_val and not self._connection.has_native_async
+        result = merge_hash(result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+        if not wrap_async:
+            self._remove_tmp_path(self._connection._shell.tmpdir)
+        return result
+
+    def _in_process(self, task_vars):
+        '''Checks whether the module can run in the worker process
+        '''
+        if self._task.async_val:
+            return False
+        in_process = task_vars.get('b1ddi_in_process')
+        if in_process is not None:
+            return boolean(self._templar.template(in_process), strict=False)
+        return str(getattr(self._connection, 'transport', '')).split('.')[-1] in IN_PROCESS_CONNECTIONS
+
+    def _find_load_module(self):
+        '''Finds the module of the task and imports it
+        '''
+        context = self._shared_loader_obj.module_loader.find_plugin_with_context(
+            self._task.action, collection_list=self._task.collections)
+        return importlib.import_module(context.plugin_resolved_name)
+
+    def _patch_update_module(self, module, task_vars):
+        '''Replaces the AnsibleModule of the module with one that takes its
+        parameters from the task instead of stdin
+        '''
+        from ansible.module_utils.basic import AnsibleModule as _AnsibleModule
+
+        class InProcessModule(_AnsibleModule):
+            def _load_params(self):
+                pass
+
+            def _record_module_result(self, o):
+                module._raw_result = o
+
+        module_args = copy.deepcopy(self._task.args)
+        self._update_module_args(self._task.action, module_args, task_vars)
+        InProcessModule.params = module_args
+        module.AnsibleModule = InProcessModule
+
+    def _task_environment(self):
+        '''Returns the variables of the task environment keyword, which the
+        module would otherwise get from the shell running it
+        '''
+        final_environment = dict()
+        environments = self._task.environment or []
+        if not isinstance(environments, list):
+            environments = [environments]
+        for environment in environments:
+            if not environment:
+                continue
+            environment = self._templar.template(environment)
+            if not isinstance(environment, dict):
+                raise AnsibleError('environment must be a dictionary, received %s (%s)' % (environment, type(environment)))
+            final_environment.update(dict((k, str(v)) for k, v in environment.items()))
+        return final_environment
+
+    def _exec_module(self, module, environment=None):
+        '''Runs main() of the module with the task environment and collects its result
+        '''
+        sys_stdout = sys.stdout
+        sys_stderr = sys.stderr
+        captured_stdout = io.StringIO()
+        captured_stderr = io.StringIO()
+        saved_environment = dict((k, os.environ.get(k)) for k in environment or {})
+        module._raw_result = None
+        try:
+            os.environ.update(environment or {})
+            sys.stdout = captured_stdout
+            sys.stderr = captured_stderr
+            module.main()
+        except SystemExit:
+            pass
+        except Exception as e:
+            module._raw_result = dict(failed=True, msg='%s failed: %s' % (self._task.action, e),
+                                      exception=traceback.format_exc())
+        finally:
+            sys.stdout = sys_stdout
+            sys.stderr = sys_stderr
+            # The connection, check mode and responses of this run must not
+            # serve a later lookup or task of the worker
+            if getattr(module, 'Request', None) is not None:
+                module.Request.unbind()
+            for k, v in saved_environment.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+        data = module._raw_result
+        if data is None:
+            # ansible-core before 2.19.1 prints the result instead of recording it
+            stdout = captured_stdout.getvalue()
+            stderr = captured_stderr.getvalue()
+            data = self._parse_returned_data(dict(
+                stdout=stdout, stdout_lines=stdout.splitlines(),
+                stderr=stderr, stderr_lines=stderr.splitlines()))
+        remove_internal_keys(data)
+        return data
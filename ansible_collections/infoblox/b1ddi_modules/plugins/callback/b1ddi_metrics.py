@@ -0,0 +1,219 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+name: b1ddi_metrics
+type: aggregate
+short_description: Summarizes the BloxOne API latency of a playbook run
+version_added: "1.1.0"
+description:
+  - Turns on the API call metrics of the BloxOne modules and lookup (C(B1DDI_METRICS)) and collects them
+    across all hosts and tasks.
+  - The calls are handed over through a spool directory on the controller (C(B1DDI_METRICS_SPOOL)). The calls
+    of the modules run on other hosts are only counted, from the totals of their C(b1_metrics).
+  - At the end of the run it prints the p50, p95 and p99 latency, the number of calls, errors, retried
+    and throttled calls per endpoint and operation, and optionally exports them as JSON and in the
+    Prometheus text format.
+requirements:
+  - enable in configuration
+options:
+  output_json:
+    description: Path of the JSON file the summary is written to.
+    type: path
+    env:
+      - name: B1DDI_METRICS_JSON
+    ini:
+      - section: callback_b1ddi_metrics
+        key: output_json
+  output_prometheus:
+    description: Path of the Prometheus text format file the summary is written to, e.g. for the
+      node exporter textfile collector.
+    type: path
+    env:
+      - name: B1DDI_METRICS_PROMETHEUS
+    ini:
+      - section: callback_b1ddi_metrics
+        key: output_prometheus
+'''
+
+EXAMPLES = '''
+# ansible.cfg
+# [defaults]
+# callbacks_enabled = infoblox.b1ddi_modules.b1ddi_metrics
+#
+# [callback_b1ddi_metrics]
+# output_json = /var/log/b1ddi/metrics.json
+# output_prometheus = /var/lib/node_exporter/b1ddi.prom
+'''
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from ansible.plugins.callback import CallbackBase
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import percentile
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+class CallbackModule(CallbackBase):
+    '''Callback plugin collecting the b1_metrics of the BloxOne tasks
+    '''
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'infoblox.b1ddi_modules.b1ddi_metrics'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.calls = []
+        # Calls of the modules that could not reach the spool directory
+        self.unspooled_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.started = time.time()
+        # The workers are forked from this process, so the modules run in
+        # process and the lookups inherit these variables
+        self.spool_dir = tempfile.mkdtemp(prefix='b1ddi-metrics-')
+        os.environ['B1DDI_METRICS'] = 'true'
+        os.environ['B1DDI_METRICS_SPOOL'] = self.spool_dir
+
+    def _collect(self, result):
+        res = getattr(result, 'result', None)
+        if res is None:
+            res = result._result
+        for item in [res] + [r for r in res.get('results', []) if isinstance(r, dict)]:
+            metrics = item.get('b1_metrics')
+            # Spooled calls are read from the spool directory at the end
+            if isinstance(metrics, dict) and not metrics.get('spooled'):
+                self.unspooled_calls += metrics.get('calls', 0)
+                self.cache_hits += metrics.get('cache_hits', 0)
+                self.cache_misses += metrics.get('cache_misses', 0)
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result)
+
+    def _collect_spool(self):
+        '''Reads the calls and cache lookups the modules and lookups handed
+        over through the spool directory
+        '''
+        for name in os.listdir(self.spool_dir):
+            with open(os.path.join(self.spool_dir, name)) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if 'method' in entry:
+                        self.calls.append(entry)
+                    else:
+                        self.cache_hits += entry.get('cache_hits', 0)
+                        self.cache_misses += entry.get('cache_misses', 0)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def summary(self):
+        '''Returns the latency percentiles and call counts per endpoint and operation
+        '''
+        groups = {}
+        for call in self.calls:
+            groups.setdefault((call['method'], call['endpoint']), []).append(call)
+        endpoints = []
+        for (method, endpoint), calls in sorted(groups.items(), key=lambda g: (g[0][1], g[0][0])):
+            latencies = sorted(c['latency'] for c in calls)
+            endpoints.append({
+                'method': method,
+                'endpoint': endpoint,
+                'calls': len(calls),
+                'errors': sum(1 for c in calls if c['status'] not in (200, 201, 204, 304)),
+                'retried': sum(1 for c in calls if c.get('retries')),
+                'throttled': sum(1 for c in calls if c.get('throttled')),
+                'bytes_sent': sum(c.get('bytes_sent', 0) for c in calls),
+                'bytes_received': sum(c.get('bytes_received', 0) for c in calls),
+                'latency_sum': round(sum(latencies), 6),
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+            })
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started)),
+            'duration': round(time.time() - self.started, 3),
+            'calls': len(self.calls),
+            'unspooled_calls': self.unspooled_calls,
+            'retried': sum(e['retried'] for e in endpoints),
+            'throttled': sum(e['throttled'] for e in endpoints),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'endpoints': endpoints,
+        }
+
+    def prometheus(self, summary):
+        '''Renders the summary in the Prometheus text exposition format
+        '''
+        lines = [
+            '# HELP b1ddi_api_latency_seconds Latency of the BloxOne API calls, retries included.',
+            '# TYPE b1ddi_api_latency_seconds summary',
+        ]
+        for e in summary['endpoints']:
+            labels = 'method="{}",endpoint="{}"'.format(_label(e['method']), _label(e['endpoint']))
+            for q in ('50', '95', '99'):
+                lines.append('b1ddi_api_latency_seconds{{{},quantile="0.{}"}} {}'.format(labels, q, e['p' + q]))
+            lines.append('b1ddi_api_latency_seconds_sum{{{}}} {}'.format(labels, e['latency_sum']))
+            lines.append('b1ddi_api_latency_seconds_count{{{}}} {}'.format(labels, e['calls']))
+        for name, key, text in (('errors', 'errors', 'BloxOne API calls that failed'),
+                                ('retried_calls', 'retried', 'BloxOne API calls sent more than once'),
+                                ('throttled_calls', 'throttled', 'BloxOne API calls throttled with a 429'),
+                                ('bytes_sent', 'bytes_sent', 'Request body bytes sent to the BloxOne API'),
+                                ('bytes_received', 'bytes_received', 'Response body bytes received from the BloxOne API')):
+            lines.append('# HELP b1ddi_api_{}_total {}.'.format(name, text))
+            lines.append('# TYPE b1ddi_api_{}_total counter'.format(name))
+            for e in summary['endpoints']:
+                lines.append('b1ddi_api_{}_total{{method="{}",endpoint="{}"}} {}'.format(
+                    name, _label(e['method']), _label(e['endpoint']), e[key]))
+        lines.extend([
+            '# HELP b1ddi_resolution_cache_lookups_total Name to ID resolutions, by cache result.',
+            '# TYPE b1ddi_resolution_cache_lookups_total counter',
+            'b1ddi_resolution_cache_lookups_total{{result="hit"}} {}'.format(summary['cache_hits']),
+            'b1ddi_resolution_cache_lookups_total{{result="miss"}} {}'.format(summary['cache_misses']),
+        ])
+        return '\n'.join(lines) + '\n'
+
+    def v2_playbook_on_stats(self, stats):
+        self._collect_spool()
+        summary = self.summary()
+
+        self._display.banner('BLOXONE API LATENCY')
+        self._display.display('{:<7} {:<52} {:>6} {:>6} {:>9} {:>9} {:>9} {:>7} {:>9}'.format(
+            'method', 'endpoint', 'calls', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'retried', 'throttled'))
+        for e in summary['endpoints']:
+            self._display.display('{:<7} {:<52} {:>6} {:>6} {:>9.1f} {:>9.1f} {:>9.1f} {:>7} {:>9}'.format(
+                e['method'], e['endpoint'], e['calls'], e['errors'],
+                e['p50'] * 1000, e['p95'] * 1000, e['p99'] * 1000, e['retried'], e['throttled']))
+        self._display.display('{} calls, {} retried, {} throttled, resolution cache {} hits / {} misses'.format(
+            summary['calls'], summary['retried'], summary['throttled'], summary['cache_hits'], summary['cache_misses']))
+        if summary['unspooled_calls']:
+            self._display.display('{} more calls made by modules on other hosts'.format(summary['unspooled_calls']))
+
+        output_json = self.get_option('output_json')
+        if output_json:
+            with open(output_json, 'w') as f:
+                json.dump(summary, f, indent=2)
+        output_prometheus = self.get_option('output_prometheus')
+        if output_prometheus:
+            # Written aside and renamed, so a scraper never reads half a file
+            tmp = '{}.tmp'.format(output_prometheus)
+            with open(tmp, 'w') as f:
+                f.write(self.prometheus(summary))
+            os.replace(tmp, output_prometheus)
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+name: bloxone
+short_description: HttpApi plugin for the Infoblox BloxOne DDI API
+version_added: "1.1.0"
+description:
+  - Lets the BloxOne DDI modules run with the C(ansible.netcommon.httpapi) connection. The API
+    calls of every task in the play are sent through Ansible's persistent connection
+    daemon, which keeps one pooled keep-alive session to the CSP host for the whole run.
+  - The CSP host is taken from C(ansible_host); C(host) and C(api_key) can then be left
+    out of the module arguments.
+options:
+  api_key:
+    type: str
+    description:
+      - API token used to authenticate against the BloxOne platform. When not set,
+        the connection password (C(ansible_httpapi_password)) is used.
+    env:
+      - name: B1DDI_API_KEY
+    vars:
+      - name: ansible_bloxone_api_key
+'''
+
+EXAMPLES = '''
+# inventory
+# [bloxone]
+# csp.infoblox.com
+#
+# [bloxone:vars]
+# ansible_connection=ansible.netcommon.httpapi
+# ansible_network_os=infoblox.b1ddi_modules.bloxone
+# ansible_httpapi_use_ssl=true
+# ansible_bloxone_api_key=<api key for access>
+
+- name: Create IP Space
+  infoblox.b1ddi_modules.b1_ipam_ip_space:
+    name: "{{ ip_space }}"
+    state: present
+'''
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.connection import ConnectionError
+from ansible.plugins.httpapi import HttpApiBase
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request, account_id
+
+
+class HttpApi(HttpApiBase):
+    '''HttpApi plugin for Infoblox BloxOne's CRUD API operations
+    '''
+    def set_become(self, become_context):
+        '''There is no privilege escalation on the BloxOne API
+        '''
+        pass
+
+    def login(self, username, password):
+        '''BloxOne authenticates every call with the API token, so there is no
+        login endpoint to call
+        '''
+        pass
+
+    def _token(self):
+        token = self.get_option('api_key') or self.connection.get_option('password')
+        if not token:
+            raise ConnectionError('api_key or the connection password must be set for the BloxOne connection')
+        return token
+
+    def get_account(self):
+        '''Returns the host and account the connection talks to, which key the
+        name to ID resolution cache of the modules
+        '''
+        return (self.connection._url, account_id(self._token()))
+
+    def send_request(self, method, endpoint, data=None, retry=None, paged=False):
+        '''Sends the API request from the persistent connection process. The
+        pooled session held by Request lives as long as the connection does.
+        '''
+        connector = Request(self.connection._url, self._token())
+        (is_error, has_changed, result) = connector._send(method, endpoint, data, retry, paged)
+        if isinstance(result, bytes):
+            result = to_text(result, errors='surrogate_or_strict')
+        return (is_error, has_changed, result)
@@ -18,21 +18,64 @@ description:
   - Uses the BloxOne DDI REST API to fetch BloxOne specified objects.  This lookup
     supports adding additional keywords to filter the return data and specify
     the desired set of returned fields.
+  - Listings are paged through and the objects of every query are returned as one flat list.
+    An API error fails the lookup.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 
 options:
     _terms:
-      description: The name of the object to return from BloxOne
+      description: The paths of the objects to return from BloxOne. Several paths are fetched
+        concurrently and their objects are returned in the same order.
       required: True
     fields:
       description: The list of field names to return for the specified object.
     filters:
-      description: a dict object that is used to filter the return objects
+      description: a dict object that is used to filter the return objects, or a list of such
+        dicts to fetch every path once per filter set, concurrently. A field maps to the value it
+        must equal, to a list of values it must be in, or to a dict of operators (C(==), C(!=), C(<),
+        C(<=), C(>), C(>=), C(~) regex, C(!~) or C(in)) and their values. The C(or) key takes a list
+        of filters, one of which must match.
     tfilters:
-      description: a dict object that is used to filter the return objects based on tags
+      description: a dict object that is used to filter the return objects based on tags, with the
+        same operators as I(filters)
+    order_by:
+      description: Fields the objects are sorted by on the server, a list or a comma separated string.
+        Append C( desc) to a field to sort it in descending order.
     provider:
       description: a dict object containing BloxOne host name and API key
+    pool_size:
+      description: Number of keep-alive connections pooled per BloxOne host. Defaults to
+        the C(B1DDI_POOL_SIZE) environment variable, or 10.
+    output_file:
+      description: Path of a file on the controller the objects are written to, one JSON object
+        per line, gzip compressed when the path ends with C(.gz). Only the count, path and sha256
+        digest of the file are returned. Only one path and filter set can be written at a time.
+    page_size:
+      description: Number of objects fetched per API call.
+      type: int
+      default: 1000
+    max_results:
+      description: Maximum number of objects returned per path and filter set. All objects are
+        returned when not set.
+      type: int
+    all_pages:
+      description: Follow the pages of the listings until all objects, or I(max_results), are
+        fetched. When false only the first I(page_size) objects are fetched.
+      type: bool
+      default: True
+    count_only:
+      description: Return the number of objects of every path and filter set instead of the
+        objects. Only their IDs are fetched and none are kept in memory.
+      type: bool
+      default: False
+    memo:
+      description: Serve a lookup identical to one made earlier by the same worker process, for the
+        same host, path, filters, fields and paging options, from memory. The results are kept for C(B1DDI_CACHE_TTL)
+        seconds, 300 by default.
+      type: bool
+      default: True
 '''
 
 EXAMPLES = """
@@ -40,84 +83,149 @@ EXAMPLES = """
   ansible.builtin.set_fact:
     ip_space: "{{ lookup('bloxone', '/ipam/ipspace' , filters={'name': 'vsethia-ip-space'}, tfilters={'Tagname': '<value>'}, fields=['id', 'name', 'comment'] , provider={'host': 'https://csp.infoblox.com', 'api_key': 'bd334826af3daff06e05765f1e444ffa'}) }}"
 
+- name: fetch two IP spaces and the subnets of both in one lookup
+  ansible.builtin.set_fact:
+    found: "{{ query('bloxone', 'ipam/ip_space', 'ipam/subnet', filters=[{'name': 'space-a'}, {'name': 'space-b'}], provider={'host': 'https://csp.infoblox.com', 'api_key': '<api key>'}) }}"
+
+- name: fetch the /24 and smaller subnets of two IP spaces, largest first
+  ansible.builtin.set_fact:
+    subnets: "{{ query('bloxone', 'ipam/subnet', filters={'cidr': {'>=': 24}, 'or': [{'space': '<ip space id>'}, {'space': '<other ip space id>'}]}, order_by='cidr', provider={'host': 'https://csp.infoblox.com', 'api_key': '<api key>'}) }}"
+
+- name: count the subnets of an IP space
+  ansible.builtin.set_fact:
+    subnet_count: "{{ lookup('bloxone', 'ipam/subnet', filters={'space': '<ip space id>'}, count_only=true, provider={'host': 'https://csp.infoblox.com', 'api_key': '<api key>'}) }}"
+
+- name: fetch the first 50 subnets only
+  ansible.builtin.set_fact:
+    subnets: "{{ query('bloxone', 'ipam/subnet', page_size=50, all_pages=false, fields=['id', 'address', 'cidr'], provider={'host': 'https://csp.infoblox.com', 'api_key': '<api key>'}) }}"
+
+- name: write all subnets to an NDJSON file
+  ansible.builtin.set_fact:
+    subnets: "{{ lookup('bloxone', 'ipam/subnet', output_file='/tmp/subnets.ndjson.gz', provider={'host': 'https://csp.infoblox.com', 'api_key': '<api key>'}) }}"
+
 """
 
-RETURN = ''' # '''
+RETURN = '''
+_list:
+  description: The objects of every path and filter set, or their number when I(count_only) is set,
+    or the count, path and digest of I(output_file).
+  type: list
+'''
+
+import copy
+import os
+import threading
+import time
 
 from ansible.plugins.lookup import LookupBase
 from ansible.errors import AnsibleError
-from ansible.module_utils.basic import *
-import requests
-import json
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import (
+    Request, RequestError, METRICS, DEFAULT_CACHE_TTL, DEFAULT_PAGE_SIZE, build_query)
+
+# Results of the lookups made by this worker process, by host, account and
+# endpoint, which holds the path, filters and fields of the lookup, and
+# paging options
+_MEMO = {}
+_MEMO_LOCK = threading.Lock()
+
+def fetch(connector, endpoint, page_size=None, max_results=None, count_only=False):
+    '''Returns the objects of the listing, or their number when count_only
+    is set, following the pages up to max_results objects
+    '''
+    try:
+        if count_only:
+            return (False, False, sum(1 for _ in connector.paginate(endpoint, page_size, max_results)))
+        return (False, False, list(connector.paginate(endpoint, page_size, max_results)))
+    except RequestError as e:
+        return e.result
 
-def get_object(obj_type, provider ,filters, tfilters, fields):
+def get_object(obj_type, provider ,filters, tfilters, fields, pool_size=None, output_file=None, page_size=None,
+               max_results=None, all_pages=True, count_only=False, order_by=None):
     '''Creating the GET API request for lookup
     '''
+    return get_objects([obj_type], provider, [filters], tfilters, fields, pool_size, output_file, page_size=page_size,
+                       max_results=max_results, all_pages=all_pages, count_only=count_only, order_by=order_by)[0]
+
+def get_objects(obj_types, provider, filter_sets, tfilters, fields, pool_size=None, output_file=None, memo=True,
+                page_size=None, max_results=None, all_pages=True, count_only=False, order_by=None):
+    '''Fetches every path once per filter set, concurrently over the pooled
+    session, and returns the results in the same order
+    '''
     try:
         host = provider['host']
         key = provider['api_key']
     except:
-        return(True, False, {'status': '400', 'response': 'Invalid Syntax for provider', 'provider':provider})
-    endpoint = f'/api/ddi/v1/{obj_type}'
-    flag=0
-    if fields!=None and isinstance(fields, list):
-        temp_fields = ",".join(fields)
-        endpoint = endpoint+"?_fields="+temp_fields
-        flag=1
-
-    if filters!={} and isinstance(filters,dict):
-        temp_filters = []
-        for k,v in filters.items():
-            if(str(v).isdigit()):
-                temp_filters.append(f'{k}=={v}')
-            else:
-                temp_filters.append(f'{k}==\'{v}\'')
-        res = " and ".join(temp_filters)
-        if(flag==1):
-            endpoint = endpoint+"&_filter="+res
-        else:
-            endpoint = endpoint+"?_filter="+res
- 
-    if tfilters!={} and isinstance(tfilters,dict):
-        temp_tfilters = []
-        for k,v in tfilters.items():
-            if(str(v).isdigit()):
-                temp_tfilters.append(f'{k}=={v}')
-            else:
-                temp_tfilters.append(f'{k}==\'{v}\'')
-        res = " and ".join(temp_tfilters)
-        if(flag==1):
-            endpoint = endpoint+"&_tfilter="+res
-        else:
-            endpoint = endpoint+"?_tfilter="+res           
-
-    # reproduced module_utils. Replace once published
+        return [(True, False, {'status': '400', 'response': 'Invalid Syntax for provider', 'provider':provider})]
+    if count_only:
+        fields = ['id']
     try:
-        headers = {'Authorization': 'Token {}'.format(key)}
-        url = '{}{}'.format(host, endpoint)
-        result = requests.get(url, headers=headers)
-    except:
-        raise Exception("API request failed")
+        endpoints = [build_query('/api/ddi/v1/{}'.format(obj_type.strip('/')), fields, filters, tfilters, order_by)
+                     for obj_type in obj_types for filters in filter_sets]
+    except ValueError as e:
+        return [(True, False, {'status': '400', 'response': str(e)})]
+    if not all_pages:
+        page_size = page_size or DEFAULT_PAGE_SIZE
+        max_results = page_size if max_results is None else min(page_size, max_results)
+    connector = Request(host, key, pool_size)
+    if output_file:
+        return [connector.export(endpoints[0], output_file, page_size, max_results)]
 
-    if result.status_code in [200,201,204]:
-        return (False, False, result.json())
-    elif result.status_code == 401:
-        return (True, False, result.content)
-    else:
-        meta = {'status': result.status_code, 'response': result.json()}
-        return (True, False, meta)
+    ttl = int(os.environ.get('B1DDI_CACHE_TTL', DEFAULT_CACHE_TTL)) if memo else 0
+    paging = (page_size, max_results, count_only)
+    now = time.time()
+    results = [None] * len(endpoints)
+    calls = [None] * len(endpoints)
+    for i, endpoint in enumerate(endpoints):
+        with _MEMO_LOCK:
+            entry = _MEMO.get((connector.tenant, endpoint, paging)) if ttl > 0 else None
+        if entry is not None and entry[0] > now:
+            results[i] = copy.deepcopy(entry[1])
+        elif endpoint not in endpoints[:i]:
+            calls[i] = (fetch, connector, endpoint) + paging
+    for i, result in enumerate(connector.parallel(*calls)):
+        if result is None:
+            continue
+        results[i] = result
+        if ttl > 0 and not result[0]:
+            with _MEMO_LOCK:
+                _MEMO[(connector.tenant, endpoints[i], paging)] = (now + ttl, copy.deepcopy(result))
+    # Repeated queries of the same call share its result
+    for i, endpoint in enumerate(endpoints):
+        if results[i] is None:
+            results[i] = copy.deepcopy(results[endpoints.index(endpoint)])
+    return results
 
 class LookupModule(LookupBase):
 
     def run(self, terms, variables=None, **kwargs):
-        try:
-            obj_type = terms[0]
-        except IndexError:
+        if not terms:
             raise AnsibleError('the object_type must be specified')
 
         fields = kwargs.pop('fields', None)
         filters = kwargs.pop('filters', {})
         tfilters = kwargs.pop('tfilters', {})
         provider = kwargs.pop('provider', {})
-        res = get_object(obj_type, provider, filters, tfilters, fields)
-        return res
+        pool_size = kwargs.pop('pool_size', None)
+        output_file = kwargs.pop('output_file', None)
+        memo = kwargs.pop('memo', True)
+        page_size = kwargs.pop('page_size', None)
+        max_results = kwargs.pop('max_results', None)
+        all_pages = kwargs.pop('all_pages', True)
+        count_only = kwargs.pop('count_only', False)
+        order_by = kwargs.pop('order_by', None)
+        filter_sets = filters if isinstance(filters, list) and filters else [filters]
+        if output_file and (count_only or len(terms) * len(filter_sets) > 1):
+            raise AnsibleError('output_file takes a single object path and filter set, without count_only')
+        res = get_objects(terms, provider, filter_sets, tfilters, fields, pool_size, output_file, memo,
+                          page_size, max_results, all_pages, count_only, order_by)
+        if METRICS.enabled:
+            METRICS.spool()
+        objects = []
+        for result in res:
+            if result[0]:
+                raise AnsibleError('BloxOne lookup failed: {}'.format(result[2]))
+            if isinstance(result[2], list):
+                objects.extend(result[2])
+            else:
+                objects.append(result[2])
+        return objects
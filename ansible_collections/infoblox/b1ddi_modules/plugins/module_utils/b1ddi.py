@@ -5,119 +5,1297 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from __future__ import (absolute_import, division, print_function)
-try: 
-    import requests
-    import json
-    import ipaddress 
-except:
-    raise ImportError("Requests module not found")
+
+# Only what every task needs is imported here. requests, the faster JSON
+# codecs and the modules used on a few code paths (ipaddress, gzip,
+# concurrent.futures, email.utils, tempfile) are imported where they are
+# used, so a module starts without paying for them.
+import fcntl
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import re
+import threading
+import time
 
 __metaclass__ = type
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_DIR = '~/.ansible/b1ddi_cache'
+DEFAULT_OPTION_CODE_TTL = 86400
+DEFAULT_RESPONSE_CACHE_ENTRIES = 512
+DEFAULT_RESPONSE_CACHE_MB = 64
+DEFAULT_RETRIES = 5
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_RETRY_MAX_BACKOFF = 30
+DEFAULT_RETRY_BUDGET = 120
+DEFAULT_RATE_LIMIT = 0
+DEFAULT_URLS_TIMEOUT = 300
+
+# Throttled and transient server side failures worth another attempt
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# BloxOne PATCH sets the given fields to the given values, so replaying it
+# is as safe as replaying a PUT
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'PATCH', 'DELETE')
+
+# Response cache writes between two scans of the cache directory, to catch
+# the entries other processes wrote
+RESPONSE_CACHE_SCAN_INTERVAL = 64
+
+# Operators of the _filter and _tfilter expressions
+FILTER_OPERATORS = ('==', '!=', '<', '<=', '>', '>=', '~', '!~', 'in')
+
+# Objects referenced by name from other objects, with the fields their
+# name to ID resolutions are cached by
+CACHED_OBJECTS = {
+    'ipam/ip_space': ('name',),
+    'dns/view': ('name',),
+    'dns/auth_zone': ('fqdn',),
+    'dns/host': ('name',),
+    'dhcp/host': ('name',),
+    'dhcp/ha_group': ('name',),
+}
+
+# Sessions are shared by every Request object created in the process, so all
+# the calls made by a module (or a lookup) reuse the same keep-alive sockets
+# instead of paying a TCP connect and TLS handshake per call.
+_SESSIONS = {}
+_HAS_REQUESTS = []
+
+def has_requests():
+    '''Checks whether requests is installed, without importing it
+    '''
+    if not _HAS_REQUESTS:
+        _HAS_REQUESTS.append(importlib.util.find_spec('requests') is not None)
+    return _HAS_REQUESTS[0]
+
+def transport_name():
+    '''Returns the HTTP transport named by B1DDI_TRANSPORT, by default requests
+    when installed and ansible's open_url otherwise
+    '''
+    name = os.environ.get('B1DDI_TRANSPORT', 'auto')
+    if name == 'auto':
+        name = 'requests' if has_requests() else 'urls'
+    return name
+
+def get_session(baseUrl, pool_size=None, transport=None):
+    '''Returns the pooled keep-alive session for the given BloxOne host
+    '''
+    if pool_size is None:
+        pool_size = int(os.environ.get('B1DDI_POOL_SIZE', DEFAULT_POOL_SIZE))
+    if transport is None:
+        transport = transport_name()
+    key = (baseUrl, pool_size, transport)
+    if key not in _SESSIONS:
+        if transport == 'urls':
+            _SESSIONS[key] = UrlsSession()
+            return _SESSIONS[key]
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        # Listings are large and compress well, ask for them compressed
+        session.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'})
+        session.transport_errors = (requests.exceptions.RequestException,)
+        _SESSIONS[key] = session
+    return _SESSIONS[key]
+
+class TransportError(Exception):
+    '''Raised by the open_url transport when the API cannot be reached
+    '''
+
+class UrlsResponse(object):
+    '''The parts of a requests response the Request class reads
+    '''
+    def __init__(self, status_code, headers, content, wire_bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.wire_bytes = wire_bytes
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+class UrlsSession(object):
+    '''HTTP transport built on ansible.module_utils.urls.open_url, for
+    controllers without requests. It opens a new connection for every call.
+    '''
+    transport_errors = (TransportError,)
+
+    def __init__(self):
+        self.headers = {'Accept-Encoding': 'gzip'}
+
+    def request(self, method, url, data=None, headers=None):
+        '''Sends the request and returns its response, error statuses included
+        '''
+        from http.client import HTTPException
+        from urllib.error import HTTPError
+        from ansible.module_utils.urls import ConnectionError, open_url
+
+        headers = dict(self.headers, **(headers or {}))
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        try:
+            try:
+                response = open_url(url, data=data, headers=headers, method=method, timeout=DEFAULT_URLS_TIMEOUT)
+            except HTTPError as e:
+                response = e
+            content = response.read()
+        except (OSError, HTTPException, ConnectionError) as e:
+            raise TransportError(str(e))
+        wire_bytes = int(response.headers.get('Content-Length') or len(content))
+        # Recent ansible-core versions decompress the body themselves
+        if response.headers.get('Content-Encoding', '').lower() == 'gzip' and content[:2] == b'\x1f\x8b':
+            import gzip
+            wire_bytes = len(content)
+            content = gzip.decompress(content)
+        return UrlsResponse(response.getcode(), response.headers, content, wire_bytes)
+
+# JSON codecs, by name
+_CODECS = {}
+
+def get_codec(name=None):
+    '''Returns the JSON codec named by B1DDI_JSON_CODEC, by default the fastest installed one
+    '''
+    if name is None:
+        name = os.environ.get('B1DDI_JSON_CODEC', 'auto')
+    if name not in _CODECS:
+        _CODECS[name] = JsonCodec(name)
+    return _CODECS[name]
+
+class JsonCodec(object):
+    '''JSON encoder and decoder of the API payloads, orjson or ujson when
+    installed and the standard library json otherwise
+    '''
+    def __init__(self, name='auto'):
+        for candidate in (('orjson', 'ujson') if name == 'auto' else (name,)):
+            try:
+                library = importlib.import_module(candidate) if candidate in ('orjson', 'ujson') else None
+            except ImportError:
+                library = None
+            if library is not None:
+                name = candidate
+                break
+        if name == 'orjson' and library is not None:
+            self._loads = library.loads
+            self._dumps = library.dumps
+        elif name == 'ujson' and library is not None:
+            self._loads = library.loads
+            self._dumps = lambda obj: library.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+        else:
+            name = 'json'
+            self._loads = json.loads
+            self._dumps = lambda obj: json.dumps(obj).encode('utf-8')
+        self.name = name
+
+    def loads(self, data):
+        '''Decodes a JSON document given as bytes or text
+        '''
+        return self._loads(data)
+
+    def dumps(self, obj):
+        '''Encodes obj as UTF-8 JSON bytes, falling back to the standard library
+        for the values a faster codec rejects
+        '''
+        try:
+            return self._dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            return json.dumps(obj).encode('utf-8')
+
+class RetryPolicy(object):
+    '''Retry policy of the API requests, read from the B1DDI_RETRY_* environment
+    variables by default
+    '''
+    def __init__(self, retries=None, backoff=None, max_backoff=None, budget=None, retry_post=None):
+        '''Initialize the number of retries, the backoff and the overall time budget
+        '''
+        env = os.environ.get
+        self.retries = int(env('B1DDI_RETRIES', DEFAULT_RETRIES) if retries is None else retries)
+        self.backoff = float(env('B1DDI_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF) if backoff is None else backoff)
+        self.max_backoff = float(env('B1DDI_RETRY_MAX_BACKOFF', DEFAULT_RETRY_MAX_BACKOFF) if max_backoff is None else max_backoff)
+        self.budget = float(env('B1DDI_RETRY_BUDGET', DEFAULT_RETRY_BUDGET) if budget is None else budget)
+        if retry_post is None:
+            retry_post = env('B1DDI_RETRY_POST', 'false').lower() in ('1', 'true', 'yes', 'on')
+        self.retry_post = retry_post
+
+    def allows(self, method, retry=None):
+        '''Tells whether a failed request may be sent again. POST requests are
+        only retried when the call, or B1DDI_RETRY_POST, opts in
+        '''
+        if retry is not None:
+            return retry
+        return method in IDEMPOTENT_METHODS or (method == 'POST' and self.retry_post)
+
+    def delay(self, attempt, response=None):
+        '''Returns the seconds to wait before the next attempt, the Retry-After
+        of the response when given, otherwise an exponential backoff with full jitter
+        '''
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                import email.utils
+                date = email.utils.parsedate_tz(retry_after)
+                if date is not None:
+                    return max(0.0, email.utils.mktime_tz(date) - time.time())
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+def wire_size(response):
+    '''Returns the bytes of the response body as sent over the wire, before
+    it was decompressed
+    '''
+    if isinstance(response, UrlsResponse):
+        return response.wire_bytes
+    try:
+        return response.raw.tell()
+    except (AttributeError, ValueError):
+        return len(response.content)
+
+def host_slug(baseUrl):
+    '''Returns the BloxOne host of the URL in a form usable as a file name
+    '''
+    host = re.sub(r'^\w+://', '', str(baseUrl))
+    return re.sub(r'[^\w.-]', '_', host)
+
+def endpoint_template(endpoint):
+    '''Returns the endpoint without its query and with object IDs replaced by
+    {id}, so the calls to the same API group together
+    '''
+    path = endpoint.split('?')[0]
+    return re.sub(r'/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}', '/{id}', path)
+
+def percentile(values, p):
+    '''Returns the nearest-rank percentile of the sorted values
+    '''
+    if not values:
+        return None
+    import math
+    rank = max(1, int(math.ceil(p / 100.0 * len(values))))
+    return values[rank - 1]
+
+class Metrics(object):
+    '''Record of the API calls and resolution cache lookups made by the
+    process, kept when the B1DDI_METRICS environment variable is set
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self):
+        return os.environ.get('B1DDI_METRICS', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+    def reset(self):
+        self.calls = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record(self, method, endpoint, status, latency, bytes_sent, bytes_received, retries=0, throttled=0):
+        '''Records one API call, retries included
+        '''
+        call = {
+            'method': method,
+            'endpoint': endpoint_template(endpoint),
+            'status': status,
+            'latency': round(latency, 6),
+            'bytes_sent': bytes_sent,
+            'bytes_received': bytes_received,
+            'retries': retries,
+            'throttled': throttled,
+        }
+        with self.lock:
+            self.calls.append(call)
+
+    def cache_lookup(self, hit):
+        '''Counts a resolution cache hit or miss
+        '''
+        with self.lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def spool(self):
+        '''Hands the calls and cache lookups recorded so far to the b1ddi_metrics
+        callback through its spool directory, and returns whether they were
+        handed over
+        '''
+        spool_dir = os.environ.get('B1DDI_METRICS_SPOOL')
+        spooled = False
+        if spool_dir:
+            try:
+                with open(os.path.join(spool_dir, '{}.ndjson'.format(os.getpid())), 'a') as f:
+                    for call in self.calls:
+                        f.write('{}\n'.format(json.dumps(call)))
+                    if self.cache_hits or self.cache_misses:
+                        f.write('{}\n'.format(json.dumps({'cache_hits': self.cache_hits,
+                                                          'cache_misses': self.cache_misses})))
+                spooled = True
+            except (IOError, OSError):
+                pass
+        self.reset()
+        return spooled
+
+    def summary(self):
+        '''Returns the totals, latency percentiles and status counts of the
+        calls, overall and per endpoint. The calls themselves are only spooled.
+        '''
+        endpoints = {}
+        statuses = {}
+        for call in self.calls:
+            key = '{} {}'.format(call['method'], call['endpoint'])
+            entry = endpoints.setdefault(key, {'calls': 0, 'api_time': 0.0, 'errors': 0, 'retries': 0,
+                                               'bytes_sent': 0, 'bytes_received': 0})
+            entry['calls'] += 1
+            entry['api_time'] = round(entry['api_time'] + call['latency'], 6)
+            entry['errors'] += 0 if call['status'] in (200, 201, 204, 304) else 1
+            entry['retries'] += call['retries']
+            entry['bytes_sent'] += call['bytes_sent']
+            entry['bytes_received'] += call['bytes_received']
+            status = 'error' if call['status'] is None else str(call['status'])
+            statuses[status] = statuses.get(status, 0) + 1
+        latencies = sorted(c['latency'] for c in self.calls)
+        return {
+            'calls': len(self.calls),
+            'api_time': round(sum(latencies), 6),
+            'latency': dict(('p{}'.format(p), percentile(latencies, p)) for p in (50, 95, 99)),
+            'retries': sum(c['retries'] for c in self.calls),
+            'throttled': sum(c['throttled'] for c in self.calls),
+            'statuses': statuses,
+            'bytes_sent': sum(c['bytes_sent'] for c in self.calls),
+            'bytes_received': sum(c['bytes_received'] for c in self.calls),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'endpoints': endpoints,
+        }
+
+METRICS = Metrics()
+
+# Rate limiters, one per BloxOne host
+_LIMITERS = {}
+
+def get_rate_limiter(baseUrl):
+    '''Returns the rate limiter shared by all the processes calling the given BloxOne host
+    '''
+    if baseUrl not in _LIMITERS:
+        _LIMITERS[baseUrl] = RateLimiter(baseUrl)
+    return _LIMITERS[baseUrl]
+
+class RateLimiter(object):
+    '''Token bucket limiting the requests per second sent to a BloxOne host.
+    The bucket lives in a lock protected file, so every fork on the controller
+    draws from the same bucket.
+    '''
+    def __init__(self, baseUrl, rate=None, burst=None, state_dir=None):
+        '''Initialize the rate, the bucket size and the bucket file location
+        '''
+        if rate is None:
+            rate = float(os.environ.get('B1DDI_RATE_LIMIT', DEFAULT_RATE_LIMIT))
+        if burst is None:
+            burst = float(os.environ.get('B1DDI_RATE_BURST', max(rate, 1)))
+        if state_dir is None:
+            state_dir = os.environ.get('B1DDI_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.rate = rate
+        self.burst = burst
+        self.state_dir = os.path.expanduser(state_dir)
+        self.path = os.path.join(self.state_dir, '{}.rate'.format(host_slug(baseUrl)))
+
+    def acquire(self):
+        '''Takes a token from the bucket, sleeping until it is available. The
+        token is reserved before sleeping, so waiting forks are served in turn
+        instead of racing for each refill.
+        '''
+        if self.rate <= 0:
+            return
+        try:
+            if not os.path.isdir(self.state_dir):
+                os.makedirs(self.state_dir, 0o700)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            return
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                try:
+                    (tokens, updated) = [float(x) for x in f.read().split()]
+                except ValueError:
+                    (tokens, updated) = (self.burst, now)
+                tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+                f.seek(0)
+                f.truncate()
+                f.write('{} {}'.format(tokens, now))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        if tokens < 0:
+            time.sleep(-tokens / self.rate)
+
+# Resolution caches, one per BloxOne host and account
+_CACHES = {}
+
+def account_id(token):
+    '''Returns a digest of the API token that identifies the account without
+    storing the token itself
+    '''
+    return hashlib.sha256(str(token).encode('utf-8')).hexdigest()[:16]
+
+def get_cache(baseUrl, account):
+    '''Returns the name to ID resolution cache for the given BloxOne host and account
+    '''
+    key = (baseUrl, account)
+    if key not in _CACHES:
+        _CACHES[key] = ResolutionCache(baseUrl, account)
+    return _CACHES[key]
+
+class ResolutionCache(object):
+    '''On-disk cache of name to ID resolutions, shared by every task run on the
+    controller against the same BloxOne host and account
+    '''
+    def __init__(self, baseUrl, account, cache_dir=None, ttl=None):
+        '''Initialize the cache file location and the TTL of its entries
+        '''
+        if cache_dir is None:
+            cache_dir = os.environ.get('B1DDI_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if ttl is None:
+            ttl = int(os.environ.get('B1DDI_CACHE_TTL', DEFAULT_CACHE_TTL))
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.path = os.path.join(self.cache_dir, '{}-{}.json'.format(host_slug(baseUrl), account))
+        self.ttl = ttl
+        self.entries = {}
+        self.mtime = None
+
+    def _key(self, obj_type, field, value):
+        return '{}|{}|{}'.format(obj_type, field, value)
+
+    def _load(self):
+        '''Reloads the entries when another task has rewritten the cache file
+        '''
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self.entries = {}
+            self.mtime = None
+            return
+        if mtime != self.mtime:
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (IOError, ValueError):
+                self.entries = {}
+            self.mtime = mtime
+
+    def _update(self, change):
+        '''Applies a change to the cache file under an exclusive lock, so that
+        concurrent forks don't drop each other's entries
+        '''
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir, 0o700)
+            with open(self.path + '.lock', 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self.mtime = None
+                    self._load()
+                    now = time.time()
+                    entries = dict((k, v) for k, v in self.entries.items() if v[1] > now)
+                    change(entries)
+                    import tempfile
+                    fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(entries, f)
+                    os.replace(tmp, self.path)
+                    self.entries = entries
+                    self.mtime = os.stat(self.path).st_mtime_ns
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        except (IOError, OSError):
+            # The cache only saves API calls, a read-only or full disk must
+            # not fail the task
+            pass
+
+    def get(self, obj_type, field, value):
+        '''Returns the cached ID of the object, None when missing or expired
+        '''
+        if self.ttl <= 0:
+            return None
+        self._load()
+        entry = self.entries.get(self._key(obj_type, field, value))
+        if entry and entry[1] > time.time():
+            return entry[0]
+        return None
+
+    def set(self, obj_type, field, value, ref):
+        '''Caches the ID of the object for the TTL
+        '''
+        if self.ttl <= 0:
+            return
+        key = self._key(obj_type, field, value)
+        expires = time.time() + self.ttl
+        self._update(lambda entries: entries.__setitem__(key, [ref, expires]))
+
+    def invalidate(self, obj_type=None, field=None, value=None, ref=None):
+        '''Drops the entries of an object, by type and field value or by ID
+        '''
+        if self.ttl <= 0:
+            return
+        key = self._key(obj_type, field, value)
+        def change(entries):
+            for k in [k for k, v in entries.items() if k == key or (ref and v[0] == ref)]:
+                del entries[k]
+        self._update(change)
+
+# Response caches, one per BloxOne host and account
+_RESPONSE_CACHES = {}
+
+def get_response_cache(baseUrl, account):
+    '''Returns the GET response cache for the given BloxOne host and account
+    '''
+    key = (baseUrl, account)
+    if key not in _RESPONSE_CACHES:
+        _RESPONSE_CACHES[key] = ResponseCache(baseUrl, account)
+    return _RESPONSE_CACHES[key]
+
+class ResponseCache(object):
+    '''On-disk cache of GET responses and their ETag and Last-Modified
+    validators. A cached response is only returned once the API confirms it
+    with a 304, and the least recently used entries are evicted beyond the
+    entry and size bounds. The directory is only scanned once the entries
+    written since the last scan may exceed the bounds.
+    '''
+    def __init__(self, baseUrl, account, cache_dir=None, max_entries=None, max_bytes=None):
+        '''Initialize the cache directory and its bounds
+        '''
+        if cache_dir is None:
+            cache_dir = os.environ.get('B1DDI_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_entries is None:
+            max_entries = int(os.environ.get('B1DDI_RESPONSE_CACHE_ENTRIES', DEFAULT_RESPONSE_CACHE_ENTRIES))
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('B1DDI_RESPONSE_CACHE_MB', DEFAULT_RESPONSE_CACHE_MB)) * 1024 * 1024)
+        self.path = os.path.join(os.path.expanduser(cache_dir), '{}-{}.responses'.format(host_slug(baseUrl), account))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Upper estimates of the cache size, None until the first scan
+        self.entry_count = None
+        self.byte_count = 0
+        self.writes = 0
+
+    def _file(self, endpoint):
+        return os.path.join(self.path, hashlib.sha256(endpoint.encode('utf-8')).hexdigest())
+
+    def get(self, endpoint):
+        '''Returns the conditional request headers and the body of the cached
+        response, None when there is none
+        '''
+        if self.max_entries <= 0:
+            return None
+        try:
+            with open(self._file(endpoint), 'rb') as f:
+                validators = json.loads(f.readline().decode('utf-8'))
+                body = f.read()
+        except (IOError, OSError, ValueError):
+            return None
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return (headers, body)
+
+    def touch(self, endpoint):
+        '''Marks the entry as recently used
+        '''
+        try:
+            os.utime(self._file(endpoint), None)
+        except OSError:
+            pass
+
+    def set(self, endpoint, response):
+        '''Caches the response when it carries a validator and fits the bounds
+        '''
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if self.max_entries <= 0 or not (etag or last_modified) or len(response.content) > self.max_bytes:
+            return
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            import tempfile
+            fd, tmp = tempfile.mkstemp(dir=self.path, prefix='.')
+            header = '{}\n'.format(json.dumps({'etag': etag, 'last_modified': last_modified})).encode('utf-8')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(response.content)
+            os.replace(tmp, self._file(endpoint))
+            # Replacing an entry counts as a new one, which only scans earlier
+            self.writes += 1
+            if self.entry_count is not None:
+                self.entry_count += 1
+                self.byte_count += len(header) + len(response.content)
+            if self.entry_count is None or self.entry_count > self.max_entries or self.byte_count > self.max_bytes \
+                    or self.writes % RESPONSE_CACHE_SCAN_INTERVAL == 0:
+                self._evict()
+        except (IOError, OSError):
+            pass
+
+    def _evict(self):
+        '''Removes the least recently used entries beyond the bounds
+        '''
+        entries = []
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            if name.startswith('.'):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        (count, total) = (0, 0)
+        for (mtime, size, path) in sorted(entries, reverse=True):
+            if count >= self.max_entries or total + size > self.max_bytes:
+                try:
+                    os.remove(path)
+                    continue
+                except OSError:
+                    pass
+            count += 1
+            total += size
+        (self.entry_count, self.byte_count) = (count, total)
+
+# DHCP option code catalogs, one per BloxOne host and account
+_CATALOGS = {}
+
+def get_option_code_catalog(baseUrl, account):
+    '''Returns the DHCP option code catalog for the given BloxOne host and account
+    '''
+    key = (baseUrl, account)
+    if key not in _CATALOGS:
+        _CATALOGS[key] = OptionCodeCatalog(baseUrl, account)
+    return _CATALOGS[key]
+
+class OptionCodeCatalog(object):
+    '''DHCP option codes of an account indexed by name, by code and by option
+    space. The catalog is kept on the controller, so that it is downloaded once
+    per TTL instead of once per task.
+    '''
+    def __init__(self, baseUrl, account, cache_dir=None, ttl=None):
+        '''Initialize the catalog file location and its TTL
+        '''
+        if cache_dir is None:
+            cache_dir = os.environ.get('B1DDI_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if ttl is None:
+            ttl = int(os.environ.get('B1DDI_OPTION_CODE_TTL', DEFAULT_OPTION_CODE_TTL))
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.path = os.path.join(self.cache_dir, '{}-{}.option_codes.json'.format(host_slug(baseUrl), account))
+        self.ttl = ttl
+        self.fetched = None
+        self.index([])
+
+    def index(self, option_codes):
+        '''Builds the lookup tables of the given option codes
+        '''
+        by_name = {}
+        by_code = {}
+        by_space = {}
+        for item in option_codes:
+            # Without an option space the first match wins, as the names of the
+            # standard DHCPv4 options come first in the listing
+            by_name.setdefault(item['name'], item)
+            by_code.setdefault(item['code'], item)
+            by_space[(item['option_space'], item['name'])] = item
+            by_space[(item['option_space'], item['code'])] = item
+        (self.option_codes, self.by_name, self.by_code, self.by_space) = (option_codes, by_name, by_code, by_space)
+
+    def load(self):
+        '''Loads the catalog from the cache file, returns whether it is fresh
+        '''
+        now = time.time()
+        if self.fetched is not None and self.fetched + self.ttl > now:
+            return True
+        if self.ttl <= 0:
+            return False
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            if cached['fetched'] + self.ttl <= now:
+                return False
+            self.index(cached['option_codes'])
+            self.fetched = cached['fetched']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def store(self, option_codes):
+        '''Indexes a freshly downloaded catalog and writes it to the cache file
+        '''
+        self.index(option_codes)
+        self.fetched = time.time()
+        if self.ttl <= 0:
+            return
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir, 0o700)
+            import tempfile
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'fetched': self.fetched, 'option_codes': option_codes}, f)
+            os.replace(tmp, self.path)
+        except (IOError, OSError):
+            pass
+
+    def get(self, key, option_space=None):
+        '''Returns the option code with the given name or number, in the given
+        option space ID if any, None when unknown
+        '''
+        code = int(key) if str(key).isdigit() else None
+        if option_space is not None:
+            return self.by_space.get((option_space, key)) or self.by_space.get((option_space, code))
+        return self.by_name.get(key) or self.by_code.get(code)
+
+    def missing(self, keys):
+        '''Returns the keys that match no option code
+        '''
+        return [k for k in keys if self.get(k) is None]
+
+def is_ref(obj_type, value):
+    '''Checks whether the value already is the ID of an object of the type,
+    e.g. ipam/ip_space/<uuid>, which needs no resolution
+    '''
+    return isinstance(value, str) and value.startswith(obj_type + '/') and len(value) > len(obj_type) + 1
+
+def with_id(fields):
+    '''Returns the fields of a listing with the id added, so that the objects
+    can be referred to by ID in later tasks
+    '''
+    if isinstance(fields, list) and fields and 'id' not in fields:
+        return ['id'] + fields
+    return fields
+
+def filter_literal(value, text=False):
+    '''Returns the value as a literal of a _filter expression. Numbers, and
+    strings of digits unless text is set, are left unquoted like the API
+    expects them.
+    '''
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)) or (not text and str(value).isdigit()):
+        return str(value)
+    return "'{}'".format(str(value).replace('\\', '\\\\').replace("'", "\\'"))
+
+def filter_expression(filters, text=False):
+    '''Returns the _filter (or _tfilter) expression of the filters dict, whose
+    conditions must all hold. A field maps to a value it must equal, to a list
+    of values it must be in, or to a dict of operators (==, !=, <, <=, >, >=,
+    ~, !~ or in) and the values they compare with. The 'or' key takes a list
+    of such dicts, any of which must hold. With text set, strings of digits
+    are compared as strings, e.g. for names.
+    '''
+    conditions = []
+    for field, value in filters.items():
+        if field == 'or':
+            if not isinstance(value, list) or not value:
+                raise ValueError("the 'or' filter takes a list of filters")
+            alternatives = ['({})'.format(filter_expression(f, text)) for f in value]
+            conditions.append(alternatives[0] if len(alternatives) == 1 else '({})'.format(' or '.join(alternatives)))
+            continue
+        operations = value.items() if isinstance(value, dict) else [('in' if isinstance(value, list) else '==', value)]
+        for op, operand in operations:
+            if op not in FILTER_OPERATORS:
+                raise ValueError('unknown filter operator {} on {}'.format(op, field))
+            if op == 'in':
+                values = operand if isinstance(operand, list) else [operand]
+                conditions.append('{} in [{}]'.format(field, ', '.join(filter_literal(v, text) for v in values)))
+            else:
+                conditions.append('{}{}{}'.format(field, op, filter_literal(operand, text)))
+    return ' and '.join(conditions)
+
+def build_query(endpoint, fields=None, filters=None, tfilters=None, order_by=None, limit=None, text=False):
+    '''Returns the endpoint with the URL encoded _fields, _filter, _tfilter,
+    _order_by and _limit parameters of a listing. Raises ValueError on an
+    invalid filter. With text set, the filters quote strings of digits.
+    '''
+    from urllib.parse import quote, urlencode
+
+    params = []
+    if isinstance(fields, list) and fields:
+        params.append(('_fields', ','.join(fields)))
+    if isinstance(filters, dict) and filters:
+        params.append(('_filter', filter_expression(filters, text)))
+    if isinstance(tfilters, dict) and tfilters:
+        params.append(('_tfilter', filter_expression(tfilters, text)))
+    if order_by:
+        params.append(('_order_by', order_by if isinstance(order_by, str) else ','.join(order_by)))
+    if limit:
+        params.append(('_limit', int(limit)))
+    if not params:
+        return endpoint
+    return '{}{}{}'.format(endpoint, '&' if '?' in endpoint else '?', urlencode(params, quote_via=quote, safe=',/'))
+
+def _canonical(value, keys=None):
+    '''Returns a comparable form of a payload value, with dicts reduced to the
+    given keys and numbers and strings compared as text
+    '''
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items() if keys is None or k in keys))
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted((_canonical(v) for v in value), key=repr))
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value)
+
+def same_value(current, desired, field=None):
+    '''Checks whether the current value of a field already is the desired one.
+    Tags must match exactly. Other dicts only need the desired keys to match,
+    and lists of dicts (DHCP options, name servers, addresses) are compared
+    in any order on the keys their desired items set.
+    '''
+    if field == 'tags':
+        return _canonical(current or {}) == _canonical(desired or {})
+    if isinstance(desired, dict):
+        return isinstance(current, dict) and all(
+            v is None or same_value(current.get(k), v, k) for k, v in desired.items())
+    if isinstance(desired, (list, tuple)):
+        if not isinstance(current, (list, tuple)) or len(current) != len(desired):
+            return False
+        keys = set(k for d in desired if isinstance(d, dict) for k in d)
+        return sorted((_canonical(v, keys or None) for v in current), key=repr) == \
+            sorted((_canonical(v) for v in desired), key=repr)
+    return _canonical(current) == _canonical(desired)
+
+def payload_changes(current, payload):
+    '''Returns the fields of the payload whose values differ from the current
+    object, None values left aside
+    '''
+    return dict((k, v) for k, v in payload.items() if v is not None and not same_value(current.get(k), v, k))
+
+class Invocation(object):
+    '''GET responses of one module run, so that a name resolved or an object
+    fetched again by the same task is not requested twice. Any write the task
+    sends drops them.
+    '''
+    def __init__(self):
+        self.responses = {}
+        self.lock = threading.Lock()
+
+    def get(self, endpoint):
+        '''Returns a copy of the response of the endpoint, None when not fetched yet
+        '''
+        with self.lock:
+            result = self.responses.get(endpoint)
+        if result is None:
+            return None
+        import copy
+        return copy.deepcopy(result)
+
+    def set(self, endpoint, result):
+        '''Keeps a copy of the successful response of the endpoint, which the
+        caller is free to change
+        '''
+        import copy
+        result = copy.deepcopy(result)
+        with self.lock:
+            self.responses[endpoint] = result
+
+    def clear(self):
+        '''Drops every response, once the task has written to the API
+        '''
+        with self.lock:
+            self.responses.clear()
+
+class RequestError(Exception):
+    '''Raised when an API request fails where no result tuple can be returned,
+    e.g. half way through a paginated listing
+    '''
+    def __init__(self, result):
+        super(RequestError, self).__init__(result)
+        self.result = result
+
 class Request(object):
     '''API Request class for Infoblox BloxOne's CRUD API operations
     '''
-    def __init__(self,baseUrl, token):
+    # Persistent connection to the httpapi daemon and the (host, account) it
+    # talks to, set by bind() when the task runs with connection: httpapi
+    connection = None
+    account = None
+    # Set by bind() for the tasks run in check mode, whose writes are not sent
+    check_mode = False
+    # GET responses of the running task, started afresh by bind()
+    invocation = None
+
+    def __init__(self,baseUrl, token, pool_size=None):
         '''Initialize the API class with baseUrl and API token
         '''
         self.baseUrl = baseUrl
         self.token = token
+        self.retry_policy = RetryPolicy()
+        self.codec = get_codec()
+        self.rate_limiter = get_rate_limiter(baseUrl)
+        if Request.connection is None:
+            self.session = get_session(baseUrl, pool_size)
+            self.tenant = (baseUrl, account_id(token))
+        else:
+            self.tenant = Request.account
+        self.cache = get_cache(*self.tenant)
+        self.option_code_catalog = get_option_code_catalog(*self.tenant)
+        self.response_cache = get_response_cache(*self.tenant)
+        # IDs this instance took from the resolution cache, and what they resolve
+        self.cached_refs = {}
 
-    def get(self,endpoint,data={}):
-        '''GET API request object
+    @classmethod
+    def bind(cls, module):
+        '''Routes the API calls of the module through the persistent connection
+        when the task runs with connection: httpapi, and starts its metrics afresh
         '''
-        try:
-            headers = {'Authorization': 'Token {}'.format(self.token)}
-            url = '{}{}'.format(self.baseUrl, endpoint)
-            result = requests.get(url, json.dumps(data), headers=headers)
-        except:
-            raise Exception("API request failed")
-    
+        METRICS.reset()
+        cls.begin()
+        cls.check_mode = bool(getattr(module, 'check_mode', False))
+        if module._socket_path:
+            from ansible.module_utils.connection import Connection
+            cls.connection = Connection(module._socket_path)
+            cls.account = tuple(cls.connection.get_account())
+        elif transport_name() == 'requests' and not has_requests():
+            from ansible.module_utils.basic import missing_required_lib
+            module.fail_json(msg=missing_required_lib('requests'))
+        elif not (module.params.get('host') and module.params.get('api_key')):
+            module.fail_json(msg='host and api_key are required unless the task uses the bloxone httpapi connection')
+
+    @classmethod
+    def unbind(cls):
+        '''Drops what bind() set up once the module run is over, so that a
+        lookup or task run later by the same worker starts from scratch
+        '''
+        cls.connection = None
+        cls.account = None
+        cls.check_mode = False
+        cls.invocation = None
+
+    @classmethod
+    def begin(cls):
+        '''Starts the GET responses of a new module run afresh
+        '''
+        cls.invocation = Invocation()
+
+    @staticmethod
+    def metrics():
+        '''Returns the b1_metrics block of the module result, empty unless
+        B1DDI_METRICS is set. The block only holds totals; the calls go to the
+        b1ddi_metrics callback through its spool and are then forgotten, so
+        that a lookup run later by the same worker does not spool them again.
+        '''
+        if not METRICS.enabled:
+            METRICS.reset()
+            return {}
+        summary = METRICS.summary()
+        summary['spooled'] = METRICS.spool()
+        return {'b1_metrics': summary}
+
+    def _send(self, method, endpoint, data=None, retry=None, paged=False):
+        '''Sends the API request over the pooled session and parses the response.
+        Throttled and transient failures are retried as the retry policy allows.
+        The pages of a listing bypass the response cache, so that a large gather
+        or export does not evict the reference data it holds.
+        '''
+        start = time.time()
+        if Request.connection is not None:
+            result = tuple(Request.connection.send_request(method, endpoint, data, retry=retry, paged=paged))
+            if METRICS.enabled:
+                meta = result[2] if result[0] and isinstance(result[2], dict) else {}
+                METRICS.record(method, endpoint, meta.get('status', 401 if result[0] else 200), time.time() - start,
+                               0 if data is None else len(json.dumps(data)), len(json.dumps(result[2])),
+                               max(0, meta.get('attempts', 1) - 1))
+            return result
+        headers = {'Authorization': 'Token {}'.format(self.token)}
+        cacheable = method == 'GET' and not paged
+        cached = self.response_cache.get(endpoint) if cacheable else None
+        if cached:
+            headers.update(cached[0])
+        url = '{}{}'.format(self.baseUrl, endpoint)
+        body = None if data is None else self.codec.dumps(data)
+        policy = self.retry_policy
+        deadline = time.time() + policy.budget
+        attempt = 0
+        throttled = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                result = self.session.request(method, url, data=body, headers=headers)
+                error = None
+            except self.session.transport_errors as e:
+                result = None
+                error = e
+            throttled += 1 if result is not None and result.status_code == 429 else 0
+            failed = error is not None or result.status_code in RETRY_STATUSES
+            if not failed or attempt >= policy.retries or not policy.allows(method, retry):
+                break
+            delay = policy.delay(attempt, result)
+            if time.time() + delay > deadline:
+                break
+            time.sleep(delay)
+            attempt += 1
+
+        if METRICS.enabled:
+            METRICS.record(method, endpoint, None if result is None else result.status_code, time.time() - start,
+                           len(body or b''), 0 if result is None else wire_size(result), attempt, throttled)
+        if error is not None:
+            return (True, False, {'status': None, 'response': 'API request failed: {}'.format(error), 'attempts': attempt + 1})
+        if result.status_code == 304 and cached:
+            self.response_cache.touch(endpoint)
+            return (False, False, self.codec.loads(cached[1]))
         if result.status_code in [200,201,204]:
-            return (False, False, result.json())
+            if cacheable:
+                self.response_cache.set(endpoint, result)
+            return (False, False, self.codec.loads(result.content))
         elif result.status_code == 401:
             return (True, False, result.content)
         else:
-            meta = {'status': result.status_code, 'response': result.json()}
+            try:
+                response = self.codec.loads(result.content)
+            except ValueError:
+                response = result.text
+            meta = {'status': result.status_code, 'response': response}
+            if attempt:
+                meta['attempts'] = attempt + 1
             return (True, False, meta)
-    
-    def create(self,endpoint,data={},body=True):
-        '''POST API request object
+
+    def _request(self, method, endpoint, data=None, retry=None, paged=False):
+        '''Sends the API request and keeps the resolution cache in line with
+        the objects it creates, renames or deletes. A successful write is
+        reported as a change; in check mode it is only reported. Within a
+        module run an endpoint already read is not requested again, except for
+        the pages of a listing, which are streamed and must not be kept.
+        '''
+        invocation = None if paged else Request.invocation
+        if method == 'GET':
+            result = invocation.get(endpoint) if invocation is not None and data is None else None
+            if result is None:
+                result = self._send_fresh(method, endpoint, data, retry, paged)
+                if invocation is not None and data is None and not result[0]:
+                    invocation.set(endpoint, result)
+            return result
+        if Request.check_mode:
+            return (False, True, {'check_mode': True, 'method': method, 'endpoint': endpoint, 'data': data})
+        result = self._send_fresh(method, endpoint, data, retry)
+        if not result[0]:
+            if invocation is not None:
+                invocation.clear()
+            self._invalidate(endpoint, data)
+            return (False, True, result[2])
+        return result
+
+    def _send_fresh(self, method, endpoint, data=None, retry=None, paged=False):
+        '''Sends the API request, and sends it once more with fresh IDs when it
+        fails with a 404 after being built from IDs of the resolution cache,
+        whose objects may since have been deleted or recreated elsewhere
+        '''
+        result = self._send(method, endpoint, data, retry, paged)
+        if result[0] and isinstance(result[2], dict) and result[2].get('status') == 404:
+            fresh = self._refresh(endpoint, data)
+            if fresh is not None:
+                result = self._send(method, fresh[0], fresh[1], retry, paged)
+        return result
+
+    def _refresh(self, endpoint, data):
+        '''Drops the cached IDs the request was built from and resolves them
+        again. Returns the endpoint and data with the new IDs, None when the
+        request used no cached ID or none of them resolves to a new one.
+        '''
+        text = '' if data is None else json.dumps(data)
+        stale = [ref for ref in list(self.cached_refs) if ref in endpoint or ref in text]
+        fresh = {}
+        for ref in stale:
+            entry = self.cached_refs.pop(ref, None)
+            self.cache.invalidate(ref=ref)
+            ref_now = self.resolve(*entry) if entry else None
+            if ref_now and ref_now != ref:
+                fresh[ref] = ref_now
+        if not fresh:
+            return None
+        for (ref, ref_now) in fresh.items():
+            endpoint = endpoint.replace(ref, ref_now)
+            text = text.replace(ref, ref_now)
+        return (endpoint, None if data is None else json.loads(text))
+
+    def _invalidate(self, endpoint, data):
+        '''Drops the cached resolutions of the object written by the request
+        '''
+        path = endpoint.split('?')[0].replace('/api/ddi/v1/', '', 1).strip('/')
+        if path in CACHED_OBJECTS:
+            for field in CACHED_OBJECTS[path]:
+                if isinstance(data, dict) and data.get(field):
+                    self.cache.invalidate(path, field, data[field])
+        elif path.rsplit('/', 1)[0] in CACHED_OBJECTS:
+            self.cache.invalidate(ref=path)
+
+    def resolve(self, obj_type, value, field='name'):
+        '''Returns the ID of the object named value, from the resolution cache
+        when possible, None when no such object exists. An ID of the object
+        type is returned as is.
+        '''
+        if is_ref(obj_type, value):
+            return value
+        ref = self.cache.get(obj_type, field, value)
+        METRICS.cache_lookup(ref is not None)
+        if ref is not None:
+            self.cached_refs[ref] = (obj_type, value, field)
+        else:
+            endpoint = build_query('/api/ddi/v1/{}'.format(obj_type), filters={field: value}, limit=1, text=True)
+            result = self.get(endpoint)
+            if isinstance(result[2], dict) and len(result[2].get('results') or []) > 0:
+                ref = result[2]['results'][0]['id']
+                self.cache.set(obj_type, field, value, ref)
+        return ref
+
+    def resolve_dhcp_host(self, name):
+        '''Returns the ID of the On-prem DHCP host, or of the HA group when no
+        host has that name
+        '''
+        if is_ref('dhcp/ha_group', name):
+            return name
+        return self.resolve('dhcp/host', name) or self.resolve('dhcp/ha_group', name)
+
+    def option_codes(self, names=()):
+        '''Returns the DHCP option code catalog, downloaded again when stale or
+        when one of the given option names or codes is not in it
         '''
+        catalog = self.option_code_catalog
+        if not names or (catalog.load() and not catalog.missing(names)):
+            return (False, False, catalog)
+        fields = ('id', 'name', 'code', 'option_space', 'type')
+        endpoint = '/api/ddi/v1/dhcp/option_code?_fields={}'.format(','.join(fields))
         try:
-            headers = {'Authorization': 'Token {}'.format(self.token)}
-            url = '{}{}'.format(self.baseUrl, endpoint)
-            if(body==True):
-                result = requests.post(url, json.dumps(data), headers=headers)
+            catalog.store([dict((k, o.get(k)) for k in fields) for o in self.paginate(endpoint)])
+        except RequestError as e:
+            return e.result
+        return (False, False, catalog)
+
+    def parallel(self, *calls, workers=None):
+        '''Runs independent calls, each a (function, arg, ...) tuple or None,
+        on a thread pool and returns their results in the same order, None for
+        the skipped calls. The pooled session serves the threads with separate
+        connections, so the calls cost about the latency of the slowest one.
+        At most workers calls, by default B1DDI_POOL_SIZE, run at once. Over
+        the persistent httpapi connection the calls are made in turn.
+        '''
+        results = [None] * len(calls)
+        pending = [(i, c) for i, c in enumerate(calls) if c]
+        workers = min(len(pending), workers or int(os.environ.get('B1DDI_POOL_SIZE', DEFAULT_POOL_SIZE)))
+        if workers <= 1 or Request.connection is not None:
+            for i, call in pending:
+                results[i] = call[0](*call[1:])
+            return results
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(i, executor.submit(*call)) for i, call in pending]
+            for i, future in futures:
+                results[i] = future.result()
+        return results
+
+    def paginate(self, endpoint, page_size=None, max_results=None):
+        '''Generator over the objects of a listing, fetched one page at a time
+        with _limit and _offset, or _page_token when the API hands one out
+        '''
+        page_size = page_size or DEFAULT_PAGE_SIZE
+        separator = '&' if '?' in endpoint else '?'
+        offset = 0
+        page_token = None
+        while max_results is None or offset < max_results:
+            limit = page_size if max_results is None else min(page_size, max_results - offset)
+            if page_token:
+                page = '{}{}_limit={}&_page_token={}'.format(endpoint, separator, limit, page_token)
             else:
-                result = requests.post(url, headers=headers)
-        except:
-            raise Exception("API request failed")
-    
-        if result.status_code in [200,201,204]:
-            return (False, False, result.json())
-        elif result.status_code == 401:
-            return (True, False, result.content)
-        else:
-            meta = {'status': result.status_code, 'response': result.json()}
-            return (True, False, meta)
-    
-    def update(self,endpoint,data={}):
-        '''PATCH API request object
+                page = '{}{}_limit={}&_offset={}'.format(endpoint, separator, limit, offset)
+            result = self._request('GET', page, paged=True)
+            if result[0] or not isinstance(result[2], dict):
+                raise RequestError(result)
+            objects = result[2].get('results') or []
+            for obj in objects:
+                yield obj
+            offset += len(objects)
+            page_token = result[2].get('page_token')
+            if len(objects) < limit:
+                break
+
+    def get_all(self, endpoint, page_size=None, max_results=None):
+        '''GET API request object for a listing, following the pages up to
+        max_results objects
         '''
         try:
-            headers = {'Authorization': 'Token {}'.format(self.token)}
-            url = '{}{}'.format(self.baseUrl, endpoint)
-            result = requests.patch(url, json.dumps(data), headers=headers)
-        except:
-            raise Exception("API request failed")
+            return (False, False, {'results': list(self.paginate(endpoint, page_size, max_results))})
+        except RequestError as e:
+            return e.result
+
+    def export(self, endpoint, path, page_size=None, max_results=None):
+        '''Streams the objects of a listing to path as NDJSON, gzip compressed
+        when path ends with .gz, and returns a summary of the file instead of
+        the objects
+        '''
+        path = os.path.expanduser(path)
+        tmp = '{}.part'.format(path)
+        import gzip
+        opener = gzip.open if path.endswith('.gz') else open
+        digest = hashlib.sha256()
+        count = 0
+        try:
+            with opener(tmp, 'wb') as f:
+                for obj in self.paginate(endpoint, page_size, max_results):
+                    line = '{}\n'.format(json.dumps(obj, sort_keys=True)).encode('utf-8')
+                    f.write(line)
+                    digest.update(line)
+                    count += 1
+            os.replace(tmp, path)
+        except RequestError as e:
+            return e.result
+        except (IOError, OSError) as e:
+            return (True, False, {'status': None, 'response': 'Cannot write {}: {}'.format(path, e)})
+        finally:
+            # Nothing is left behind when the listing or the write fails
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return (False, False, {'count': count, 'path': path, 'digest': 'sha256:{}'.format(digest.hexdigest())})
+
+    def get(self,endpoint,data={}):
+        '''GET API request object
+        '''
+        return self._request('GET', endpoint, data if data else None)
     
-        if result.status_code in [200,201,204]:
-            return (False, False, result.json())
-        elif result.status_code == 401:
-            return (True, False, result.content)            
-        else:
-            meta = {'status': result.status_code, 'response': result.json()}
-            return (True, False, meta)
+    def create(self,endpoint,data={},body=True,retry=None):
+        '''POST API request object, retried on failure only when retry is set
+        or B1DDI_RETRY_POST is enabled
+        '''
+        return self._request('POST', endpoint, data if body else None, retry)
+    
+    def update(self,endpoint,data={},current=None):
+        '''PATCH API request object. Given the current object, only the fields
+        that differ are sent, and nothing at all when none does.
+        '''
+        if current is not None:
+            data = payload_changes(current, data)
+            if not data:
+                return (False, False, {'result': current})
+        return self._request('PATCH', endpoint, data)
 
     def put(self,endpoint,data={}):
         '''PUT API request object
         '''
-        try:
-            headers = {'Authorization': 'Token {}'.format(self.token)}
-            url = '{}{}'.format(self.baseUrl, endpoint)
-            result = requests.put(url, json.dumps(data), headers=headers)
-        except:
-            raise Exception("API request failed")
-    
-        if result.status_code in [200,201,204]:
-            return (False, False, result.json())
-        elif result.status_code == 401:
-            return (True, False, result.content)            
-        else:
-            meta = {'status': result.status_code, 'response': result.json()}
-            return (True, False, meta)
+        return self._request('PUT', endpoint, data)
     
     def delete(self,endpoint,data={}, body=False):
         '''DELETE API request object
         '''
-        try:
-            headers = {'Authorization': 'Token {}'.format(self.token)}
-            url = '{}{}'.format(self.baseUrl, endpoint)
-            if(body==True):
-                result = requests.delete(url, json.dumps(data), headers=headers)
-            else:
-                result = requests.delete(url, headers=headers)
-        except:
-            raise Exception("API request failed")
-    
-        if result.status_code in [200,201,204]:
-            return (False, False, result.json())
-        elif result.status_code == 401:
-            return (True, False, result.content)            
-        else:
-            meta = {'status': result.status_code, 'response': result.json()}
-            return (True, False, meta)
+        return self._request('DELETE', endpoint, data if body else None)
 
 class Utilities(object):
     '''Helper Functions for BloxOne DDI object operations
@@ -130,6 +1308,7 @@ class Utilities(object):
     def normalize_ip(self, address, cidr=-1):
         '''Validates the IP Address
         '''
+        import ipaddress
         address = address.split('/')
         try:
             ipaddress.ip_address(address[0])
@@ -152,17 +1331,15 @@ class Utilities(object):
         return payload
     
     def dhcp_options(self, key, data, dhcp_option_codes):
-        """Create a list of DHCP option dicts"""
+        """Create a list of DHCP option dicts, with the option codes looked up
+        by name or number in the OptionCodeCatalog"""
         payload = []
         for i in data[key]:
             for k, v in i.items():
                 dhcp_option = {}
-                for item in dhcp_option_codes:
-                    if item["name"] == k:
-                        dhcp_option_code = item["id"]
-                        break
+                dhcp_option_code = dhcp_option_codes.get(k)
                 if dhcp_option_code:
-                    dhcp_option["option_code"] = dhcp_option_code
+                    dhcp_option["option_code"] = dhcp_option_code["id"]
                     # Check for and calculate first|last router
                     if k == 'routers':
                         if v == 'first' or v == 'last':
@@ -177,6 +1354,7 @@ class Utilities(object):
         """Calculate router ip based on subnet"""
         router = None
         if 'address' in data.keys() and data['address']!=None:
+            import ipaddress
             address = self.normalize_address(data['address'])
             subnet = ipaddress.ip_network(address)
             if command == 'first':
@@ -218,6 +1396,7 @@ class Utilities(object):
         for i in data[key]:
             for k, v in i.items():
                 addr = {}
+                ipspace_id = k if is_ref('ipam/ip_space', k) else None
                 for item in aspace:
                     if item["name"] == k:
                         ipspace_id = item["id"]
@@ -15,18 +15,21 @@ version_added: "1.0.1"
 description:
   - Get, Create, Update and Delete DNS Authoritative Zone on Infoblox BloxOne DDI. This module manages the DNS Authoritative Zone object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   fqdn:
     description:
       - Configures the fqdn of the DNS Authoritative Zone to fetch, add, update or remove from the system. 
@@ -128,25 +131,24 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
+import json
 
 def get_cname_record(data):
     '''Fetches the BloxOne DDI DNS Authoritative Zone object
     '''
     connector = Request(data['host'], data['api_key'])
     if 'zone' in data.keys() and data['zone']!=None:
-        zone_endpoint = '{}\"{}\"'.format('/api/ddi/v1/dns/auth_zone?_filter=fqdn==',data['zone'])
-        zone = connector.get(zone_endpoint)
-        if ('results' in zone[2].keys() and len(zone[2]['results']) > 0):
-            zone_ref = zone[2]['results'][0]['id']
+        zone_ref = connector.resolve('dns/auth_zone', data['zone'], field='fqdn')
+        if zone_ref:
             if 'name' in data.keys() and data['name']!=None:
                 endpoint = f"/api/ddi/v1/dns/record?_filter=zone=='{zone_ref}' and name_in_zone=='{data['name']}' and type=='CNAME'"
             else:
                 endpoint = f"/api/ddi/v1/dns/record?_filter=zone=='{zone_ref}' and type=='CNAME'"
             return connector.get(endpoint)  
         else:
-            return(True, False, {'status': '400', 'response': 'Error in fetching DNS Zone', 'data':data, 'zone': zone})
+            return(True, False, {'status': '400', 'response': 'Error in fetching DNS Zone', 'data':data})
     else: 
             endpoint = f"/api/ddi/v1/dns/record?_filter=type=='CNAME'"
             return connector.get(endpoint)
@@ -176,7 +178,7 @@ def update_cname_record(data):
     if 'tags' in data.keys() and data['tags']!=None:
         payload['tags']=helper.flatten_dict_object('tags',data) 
     endpoint = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_cname_record(data):
     '''Creates a new BloxOne DDI DNS Authoritative Zone object
@@ -192,10 +194,9 @@ def create_cname_record(data):
           if('results' in auth_zone[2].keys() and len(auth_zone[2]['results']) > 0):
             return update_cname_record(data)
           else:
-            zone_endpoint = '{}\"{}\"'.format('/api/ddi/v1/dns/auth_zone?_filter=fqdn==',data['zone'])
-            zone = connector.get(zone_endpoint)
-            if('results' in zone[2].keys() and len(zone[2]['results']) > 0):
-                payload['zone'] = zone[2]['results'][0]['id']
+            zone_ref = connector.resolve('dns/auth_zone', data['zone'], field='fqdn')
+            if zone_ref:
+                payload['zone'] = zone_ref
                 payload['name_in_zone'] = data['name']
                 payload['rdata'] = {'cname': data['can_name']}
                 payload['type'] = "CNAME"
@@ -229,8 +230,8 @@ def main():
     '''
     argument_spec = dict(
         zone=dict(type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         name=dict(type='str'),
         can_name=dict(type='str'),
         comment=dict(type='str'),
@@ -242,13 +243,14 @@ def main():
                   'get': get_cname_record,
                   'absent': delete_cname_record}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
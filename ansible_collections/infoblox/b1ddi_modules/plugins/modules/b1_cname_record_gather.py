@@ -15,18 +15,21 @@ version_added: "1.0.1"
 description:
   - Get, Create, Update and Delete IP spaces on Infoblox BloxOne DDI. This module manages the IPAM IP space object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   name:
     description:
       - Configures the name of object to fetch, add, update or remove from the system. User can also update the name as it is possible
@@ -41,6 +44,26 @@ options:
     description:
       - Configures the comment/description for the object to add or update from the system.
     type: str
+  page_size:
+    description:
+      - Number of objects fetched per API call. Listings are paged through until all objects, or I(max_results), are fetched.
+    type: int
+    default: 1000
+  max_results:
+    description:
+      - Maximum number of objects to return. All objects are returned when not set.
+    type: int
+  order_by:
+    description:
+      - Fields the objects are sorted by on the server, a list or a comma separated string. Append C( desc) to a
+        field to sort it in descending order.
+    type: raw
+  output_file:
+    description:
+      - Path of a file on the controller the objects are written to, one JSON object per line. The file is gzip
+        compressed when the path ends with C(.gz). The result then holds the C(count), C(path) and sha256 C(digest)
+        of the uncompressed content instead of the objects.
+    type: path
   state:
     description:
       - Configures the state of the object on BloxOne DDI. When this value is set to C(get), the object
@@ -61,60 +84,30 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
-from ..module_utils.b1ddi import Request, Utilities
-import json
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.b1ddi import Request, build_query, with_id
 
 def get_cname_record_gather(data):
-    '''Fetches the BloxOne DDI IP Space object
-    '''
-    '''Fetches the BloxOne DDI IP Space object
+    '''Fetches the BloxOne DDI CNAME record objects
     '''
     connector = Request(data['host'], data['api_key'])
 
-    endpoint = f'/api/ddi/v1/dns/record'
+    endpoint = '/api/ddi/v1/dns/record'
 
-    flag=0
-    fields=data['fields']
+    fields=with_id(data['fields'])
     filters=data['filters']
     if 'name' in filters:
         filters['dns_name_in_zone'] = filters.pop('name')
     if 'cname' in filters:
         filters['dns_rdata'] = filters.pop('cname')
-    if fields!=None and isinstance(fields, list):
-        temp_fields = ",".join(fields)
-        endpoint = endpoint+"?_fields="+temp_fields
-        flag=1
-
-    if filters!={} and isinstance(filters,dict):
-        temp_filters = []
-        for k,v in filters.items():
-            if(str(v).isdigit()):
-                temp_filters.append(f'{k}=={v}')
-            else:
-                temp_filters.append(f'{k}==\'{v}\'')
-        res = " and ".join(temp_filters)
-        if(flag==1):
-            endpoint = endpoint+"&_filter="+res
-        else:
-            endpoint = endpoint+"?_filter="+res
-
     try:
-        return connector.get(endpoint)
-    except:
-        raise Exception(endpoint)
-
+        endpoint = build_query(endpoint, fields, filters, None, data['order_by'])
+    except ValueError as e:
+        return (True, False, {'status': '400', 'response': str(e)})
 
-
-    if result.status_code in [200,201,204]:
-        meta = {'status': result.status_code,'url': url, 'response': result.json()} 
-        return (False, False, meta)
-    elif result.status_code == 401:
-        meta = {'status': result.status_code,'url': url, 'response': result.json()}
-        return (True, False, meta)
-    else:
-        meta = {'status': result.status_code,'url': url, 'response': result.json()}
-        return (True, False, meta)
+    if data['output_file']:
+        return connector.export(endpoint, data['output_file'], data['page_size'], data['max_results'])
+    return connector.get_all(endpoint, data['page_size'], data['max_results'])
 
 
 def main():
@@ -122,11 +115,15 @@ def main():
     '''
     argument_spec = dict(
         name=dict(default='', type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         comment=dict(type='str'),
         fields=dict(type='list'),
         filters=dict(type='dict', default={"type": "CNAME"}),
+        page_size=dict(type='int', default=1000),
+        max_results=dict(type='int'),
+        order_by=dict(type='raw'),
+        output_file=dict(type='path'),
         tags=dict(type='list', elements='dict', default=[{}]),
         state=dict(type='str', default='present', choices=['present','absent','gather'])
     )
@@ -135,13 +132,14 @@ def main():
                   'gather': get_cname_record_gather
                   }
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
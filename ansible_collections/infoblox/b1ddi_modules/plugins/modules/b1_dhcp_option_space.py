@@ -4,7 +4,6 @@
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
 from __future__ import (absolute_import, division, print_function)
-from email.policy import default
 __metaclass__ = type
 
 DOCUMENTATION = '''
@@ -16,18 +15,21 @@ version_added: "1.0.1"
 description:
   -  Create, Update and Delete Option spaces on Infoblox BloxOne DDI. This module manages the IPAM Optionspace object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   name:
     description:
       - Configures the name of object to fetch, add, update or remove from the system. User can also update the name as it is possible
@@ -95,7 +97,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 import json
 
@@ -137,7 +139,7 @@ def update_option_space(data):
         payload['tags']=helper.flatten_dict_object('tags',data)
     
     endpoint  = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_option_space(data):
     '''Creates a new BloxOne DDI Option Space object
@@ -187,8 +189,8 @@ def main():
     argument_spec = dict(
         name=dict(default='', type='str'),
         protocol=dict(default='',type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         comment=dict(type='str'),
         tags=dict(type='list', elements='dict', default=[{}]),
         state=dict(type='str', default='present', choices=['present','absent','get'])
@@ -198,13 +200,14 @@ def main():
                   'get': get_option_space,
                   'absent': delete_option_space}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
@@ -15,18 +15,21 @@ version_added: "1.0.1"
 description:
   - Get, Create, Update and Delete DNS Authoritative Zone on Infoblox BloxOne DDI. This module manages the DNS Authoritative Zone object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   fqdn:
     description:
       - Configures the fqdn of the DNS Authoritative Zone to fetch, add, update or remove from the system. 
@@ -45,6 +48,7 @@ options:
   view:
     description:
       - Configures the name of DNS View containing the DNS Authoritative Zone to fetch, add, update or remove from the system. 
+      - The ID of the DNS View (e.g. C(dns/view/...) as returned by the gather modules) can be given instead of its name, which saves its lookup.
     type: str 
   primary_type:
     description:
@@ -130,7 +134,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 
 def get_auth_zone(data):
@@ -138,10 +142,8 @@ def get_auth_zone(data):
     '''
     connector = Request(data['host'], data['api_key'])
     if 'view' in data.keys() and data['view']!=None:
-        view_endpoint = '{}\"{}\"'.format('/api/ddi/v1/dns/view?_filter=name==',data['view'])
-        view = connector.get(view_endpoint)
-        if ('results' in view[2].keys() and len(view[2]['results']) > 0):
-            view_ref = view[2]['results'][0]['id']
+        view_ref = connector.resolve('dns/view', data['view'])
+        if view_ref:
             if 'fqdn' in data.keys() and data['fqdn']!=None:
                 endpoint = f"/api/ddi/v1/dns/auth_zone?_filter=view=='{view_ref}' and fqdn=='{data['fqdn']}'"
             else:
@@ -161,7 +163,9 @@ def update_auth_zone(data):
     '''
     connector = Request(data['host'], data['api_key'])
     helper = Utilities()    
-    reference = get_auth_zone(data)
+    secondaries = data['internal_secondaries'] if 'internal_secondaries' in data.keys() and data['internal_secondaries']!=None else None
+    results = connector.parallel((get_auth_zone, data), *[(connector.resolve, 'dns/host', i) for i in secondaries or []])
+    reference = results[0]
     if('results' in reference[2].keys() and len(reference[2]['results']) > 0):
         ref_id = reference[2]['results'][0]['id']
     else:
@@ -171,20 +175,17 @@ def update_auth_zone(data):
     if 'external_primaries' in data.keys() and data['external_primaries']!=None:
         #payload['external_primaries']=helper.flatten_dict_object('external_primaries',data)
         payload['external_primaries']=data['external_primaries'] 
-    if 'internal_secondaries' in data.keys() and data['internal_secondaries']!=None:  
+    if secondaries!=None:  
         payload['internal_secondaries'] = [] 
-        for i in data['internal_secondaries']:     
-            endpoint = '{}\"{}\"'.format('/api/ddi/v1/dns/host?_filter=name==',i)
-            dns_host = connector.get(endpoint)
-            if ('results' in dns_host[2].keys() and len(dns_host[2]['results']) > 0):
-                ref = dns_host[2]['results'][0]['id']
+        for ref in results[1:]:     
+            if ref:
                 payload['internal_secondaries'].append({"host": ref})
             else:
                 return (True, False, {'status': '400', 'response': 'Error in fetching DNS On-prem hosts', 'data':data})
     if 'tags' in data.keys() and data['tags']!=None:
         payload['tags']=helper.flatten_dict_object('tags',data) 
     endpoint = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_auth_zone(data):
     '''Creates a new BloxOne DDI DNS Authoritative Zone object
@@ -197,10 +198,11 @@ def create_auth_zone(data):
         if('results' in auth_zone[2].keys() and len(auth_zone[2]['results']) > 0):
             return update_auth_zone(data)
         else:
-            view_endpoint = '{}\"{}\"'.format('/api/ddi/v1/dns/view?_filter=name==',data['view'])
-            view = connector.get(view_endpoint)
-            if('results' in view[2].keys() and len(view[2]['results']) > 0):
-                payload['view'] = view[2]['results'][0]['id']
+            secondaries = data['internal_secondaries'] if 'internal_secondaries' in data.keys() and data['internal_secondaries']!=None else None
+            results = connector.parallel((connector.resolve, 'dns/view', data['view']), *[(connector.resolve, 'dns/host', i) for i in secondaries or []])
+            view_ref = results[0]
+            if view_ref:
+                payload['view'] = view_ref
                 payload['primary_type'] = data['primary_type'] if 'primary_type' in data.keys() else ''
                 payload['comment'] = data['comment'] if 'comment' in data.keys() else ''
                 payload['fqdn'] = data['fqdn']
@@ -209,13 +211,10 @@ def create_auth_zone(data):
                     payload['external_primaries']=data['external_primaries'] 
                 if 'tags' in data.keys() and data['tags']!=None:
                     payload['tags']=helper.flatten_dict_object('tags',data)  
-                if 'internal_secondaries' in data.keys() and data['internal_secondaries']!=None:  
+                if secondaries!=None:  
                     payload['internal_secondaries'] = [] 
-                    for i in data['internal_secondaries']:     
-                        endpoint = '{}\"{}\"'.format('/api/ddi/v1/dns/host?_filter=name==',i)
-                        dns_host = connector.get(endpoint)
-                        if ('results' in dns_host[2].keys() and len(dns_host[2]['results']) > 0):
-                            ref = dns_host[2]['results'][0]['id']
+                    for ref in results[1:]:     
+                        if ref:
                             payload['internal_secondaries'].append({"host": ref})
                         else:
                             return (True, False, {'status': '400', 'response': 'Error in fetching DNS On-prem hosts', 'data':data}) 
@@ -246,8 +245,8 @@ def main():
     '''
     argument_spec = dict(
         fqdn=dict(type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         primary_type=dict(type='str'),
         internal_secondaries=dict(type='list', elements='str', default=['']),
         external_primaries=dict(type='list', elements='str', default=[]),
@@ -261,13 +260,14 @@ def main():
                   'get': get_auth_zone,
                   'absent': delete_auth_zone}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,299 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: b1_dns_record_bulk
+short_description: Configure many DNS records on Infoblox BloxOne DDI in one task
+version_added: "1.1.0"
+description:
+  - Creates, updates and deletes DNS records of any type, in any number of DNS Authoritative Zones, in one task.
+  - Every zone is resolved once and its existing records are listed once. The creates, updates and deletes are
+    worked out on the controller and sent concurrently.
+  - Every record gets its own result. Records that fail do not stop the others, the task fails once all are done.
+requirements:
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
+options:
+  api_key:
+    description:
+      - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
+    type: str
+    required: false
+  host:
+    description:
+      - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
+    type: str
+    required: false
+  records:
+    description:
+      - The DNS records to configure. Each record takes the C(zone) fqdn, the C(name) in the zone, the C(type) and
+        the C(rdata) of the record, and optionally C(ttl), C(comment), C(tags) and C(state).
+      - C(address) (A, AAAA), C(can_name) (CNAME), C(ns_server) (NS) and C(dname) (PTR) can be given instead of
+        C(rdata).
+      - A record is matched with an existing one by zone, name, type and rdata, and by zone, name and type only
+        for CNAME records, whose rdata is then updated. C(ttl), C(comment) and C(tags) are only updated when given.
+      - An absent record without rdata removes every record of its name and type.
+      - A record given more than once is configured once, with the fields of its last entry.
+    type: list
+    elements: dict
+    required: true
+  purge:
+    description:
+      - Deletes the static records of the listed zones and types that are not in I(records).
+    type: bool
+    default: false
+  workers:
+    description:
+      - Number of writes sent at once. Defaults to the C(B1DDI_POOL_SIZE) environment variable, or 10.
+    type: int
+  state:
+    description:
+      - Configures the state of the records that do not set their own. When this value is set to C(present),
+        the records are configured on the platform and when this value is set to C(absent) they are removed
+        (if necessary) from the platform.
+    type: str
+    default: present
+    choices:
+      - present
+      - absent
+'''
+
+EXAMPLES = '''
+    - name: Configure the records of two zones
+      b1_dns_record_bulk:
+        api_key: "{{ api_key }}"
+        host: "{{ host }}"
+        records:
+          - {zone: example.com., name: www, type: A, address: 10.0.0.10}
+          - {zone: example.com., name: www, type: A, address: 10.0.0.11, ttl: 300}
+          - {zone: example.com., name: web, type: CNAME, can_name: www.example.com.}
+          - {zone: example.com., name: mail, type: MX, rdata: {exchange: mx.example.com., preference: 10}}
+          - {zone: 0.0.10.in-addr.arpa., name: '10', type: PTR, dname: www.example.com.}
+          - {zone: example.com., name: old, type: A, address: 10.0.0.99, state: absent}
+
+    - name: Make the A records of example.com exactly these
+      b1_dns_record_bulk:
+        api_key: "{{ api_key }}"
+        host: "{{ host }}"
+        purge: true
+        records: "{{ a_records }}"
+'''
+
+RETURN = ''' # '''
+
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.b1ddi import Request, RequestError, Utilities, build_query, payload_changes, same_value
+
+# Shorthands of the rdata of the single record modules, by record type
+RDATA_FIELDS = {
+    'A': ('address', 'address'),
+    'AAAA': ('address', 'address'),
+    'CNAME': ('can_name', 'cname'),
+    'NS': ('ns_server', 'dname'),
+    'PTR': ('dname', 'dname'),
+}
+
+# Types a name holds at most one record of
+SINGLE_VALUED_TYPES = ('CNAME',)
+
+RECORD_FIELDS = ['id', 'zone', 'name_in_zone', 'type', 'rdata', 'ttl', 'comment', 'tags', 'source']
+
+def desired_records(data):
+    '''Validates the records of the task and returns them with their rdata,
+    type and state filled in, or the error message
+    '''
+    helper = Utilities()
+    records = []
+    for i, record in enumerate(data['records']):
+        if not isinstance(record, dict) or not all(record.get(k) not in (None, '') for k in ('zone', 'type')) \
+                or record.get('name') is None:
+            return (None, 'record {} needs a zone, name and type'.format(i))
+        record_type = str(record['type']).upper()
+        rdata = record.get('rdata')
+        shorthand = RDATA_FIELDS.get(record_type)
+        if rdata is None and shorthand and record.get(shorthand[0]) is not None:
+            rdata = {shorthand[1]: record[shorthand[0]]}
+        state = record.get('state') or data['state']
+        if state not in ('present', 'absent'):
+            return (None, 'record {} has an invalid state {}'.format(i, state))
+        if rdata is None and state == 'absent':
+            rdata = {}
+        if not isinstance(rdata, dict) or (not rdata and state == 'present'):
+            return (None, 'record {} needs rdata'.format(i))
+        desired = {'zone': record['zone'], 'name_in_zone': str(record['name']), 'type': record_type,
+                   'rdata': rdata, 'state': state}
+        if record.get('ttl') is not None:
+            if not str(record['ttl']).isdigit():
+                return (None, 'record {} has an invalid ttl {}'.format(i, record['ttl']))
+            desired['ttl'] = int(record['ttl'])
+        if record.get('comment') is not None:
+            desired['comment'] = record['comment']
+        if record.get('tags') is not None:
+            desired['tags'] = helper.flatten_dict_object('tags', record) if isinstance(record['tags'], list) else record['tags']
+        records.append(desired)
+    return (records, None)
+
+def matches(existing, desired):
+    '''Checks whether the existing record is the one the desired record stands for
+    '''
+    if desired['type'] in SINGLE_VALUED_TYPES:
+        return True
+    return same_value(existing.get('rdata') or {}, desired['rdata'])
+
+def record_changes(existing, desired):
+    '''Returns the fields of the existing record to patch to match the desired one
+    '''
+    fields = ['ttl', 'comment', 'tags']
+    if desired['type'] in SINGLE_VALUED_TYPES and desired['rdata']:
+        fields.append('rdata')
+    return payload_changes(existing, dict((k, desired[k]) for k in fields if k in desired))
+
+def load_records(connector, zone_ref, types):
+    '''Lists the records of the given types in the zone, one page at a time
+    '''
+    endpoint = build_query('/api/ddi/v1/dns/record', RECORD_FIELDS, {'zone': zone_ref, 'type': sorted(types)})
+    try:
+        return list(connector.paginate(endpoint))
+    except RequestError as e:
+        return e
+
+def same_record(first, second):
+    '''Checks whether two records of the task stand for the same record
+    '''
+    if (first['zone'], first['name_in_zone'], first['type']) != (second['zone'], second['name_in_zone'], second['type']):
+        return False
+    if first['type'] in SINGLE_VALUED_TYPES:
+        return True
+    return same_value(first['rdata'], second['rdata']) and same_value(second['rdata'], first['rdata'])
+
+def reconcile_records(data):
+    '''Creates, updates and deletes the records of the task, with one lookup
+    per zone and one listing of its records
+    '''
+    (records, error) = desired_records(data)
+    if error:
+        return (True, False, {'status': '400', 'response': error})
+    connector = Request(data['host'], data['api_key'])
+
+    zones = sorted(set(r['zone'] for r in records))
+    refs = connector.parallel(*[(connector.resolve, 'dns/auth_zone', zone, 'fqdn') for zone in zones])
+    missing = [zone for zone, ref in zip(zones, refs) if not ref]
+    if missing:
+        return (True, False, {'status': '400', 'response': 'DNS Zone not found', 'zones': missing})
+    zone_refs = dict(zip(zones, refs))
+    zone_names = dict(zip(refs, zones))
+
+    # A record given twice is configured once, with the fields of its last entry
+    results = []
+    items = []
+    for i, record in enumerate(records):
+        results.append({'zone': record['zone'], 'name': record['name_in_zone'], 'type': record['type']})
+        first = next((j for j, item in items if same_record(item, record)), None)
+        if first is None:
+            items.append((i, record))
+        else:
+            items = [(j, dict(item, **record) if j == first else item) for j, item in items]
+            results[i].update(action='duplicate', duplicate_of=first)
+
+    types = {}
+    for _, record in items:
+        record['zone'] = zone_refs[record['zone']]
+        types.setdefault(record['zone'], set()).add(record['type'])
+    listings = connector.parallel(*[(load_records, connector, ref, types[ref]) for ref in sorted(types)])
+    existing = {}
+    for listing in listings:
+        if isinstance(listing, RequestError):
+            return listing.result
+        for record in listing:
+            existing.setdefault((record.get('zone'), record.get('name_in_zone'), record.get('type')), []).append(record)
+
+    calls = []
+    deletes = {}
+    kept = set()
+    for i, record in items:
+        result = results[i]
+        candidates = existing.get((record['zone'], record['name_in_zone'], record['type']), [])
+        if record['state'] == 'absent':
+            # Without rdata every record of the name and type goes
+            ids = [c['id'] for c in candidates if matches(c, record)][:None if not record['rdata'] else 1]
+            if ids:
+                result.update(action='deleted', ids=ids)
+                deletes.update((ref, i) for ref in ids if ref not in deletes)
+            else:
+                result['action'] = 'unchanged'
+            continue
+        match = next((c for c in candidates if matches(c, record)), None)
+        if match is None:
+            payload = dict((k, v) for k, v in record.items() if k != 'state')
+            payload.setdefault('comment', '')
+            result['action'] = 'created'
+            calls.append((i, (connector.create, '/api/ddi/v1/dns/record', payload)))
+            continue
+        kept.add(match['id'])
+        result['id'] = match['id']
+        patch = record_changes(match, record)
+        if patch:
+            result.update(action='updated', changes=sorted(patch))
+            calls.append((i, (connector.update, '/api/ddi/v1/{}'.format(match['id']), patch)))
+        else:
+            result['action'] = 'unchanged'
+    if data['purge']:
+        for candidates in existing.values():
+            for record in candidates:
+                if record['id'] not in kept and record['id'] not in deletes \
+                        and 'STATIC' in (record.get('source') or ['STATIC']):
+                    deletes[record['id']] = len(results)
+                    results.append({'zone': zone_names.get(record.get('zone')), 'name': record.get('name_in_zone'),
+                                    'type': record.get('type'), 'action': 'deleted', 'ids': [record['id']],
+                                    'purged': True})
+    calls += [(i, (connector.delete, '/api/ddi/v1/{}'.format(ref))) for ref, i in deletes.items()]
+
+    changed = bool(calls)
+    if calls and not data.get('check_mode'):
+        responses = connector.parallel(*[call for _, call in calls], workers=data['workers'])
+        # A record some of whose deletes went through still changed the zone
+        changed = any(not response[0] for response in responses)
+        failed = {}
+        for (i, _), response in zip(calls, responses):
+            if response[0]:
+                failed.setdefault(i, response[2])
+            elif results[i]['action'] == 'created':
+                results[i]['id'] = (response[2].get('result') or {}).get('id')
+        for i, response in failed.items():
+            results[i].update(action='failed', response=response)
+
+    summary = dict((action, sum(1 for r in results if r['action'] == action))
+                   for action in ('created', 'updated', 'deleted', 'unchanged', 'failed'))
+    return (summary['failed'] > 0, changed, dict(summary, results=results))
+
+def main():
+    '''Main entry point for module execution
+    '''
+    argument_spec = dict(
+        api_key=dict(type='str'),
+        host=dict(type='str'),
+        records=dict(type='list', elements='dict', required=True),
+        purge=dict(type='bool', default=False),
+        workers=dict(type='int'),
+        state=dict(type='str', default='present', choices=['present','absent'])
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
+    (is_error, has_changed, result) = reconcile_records(dict(module.params, check_mode=module.check_mode))
+
+    if not is_error:
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
+    else:
+        module.fail_json(msg='Operation failed', changed=has_changed, meta=result, **Request.metrics())
+
+if __name__ == '__main__':
+    main()
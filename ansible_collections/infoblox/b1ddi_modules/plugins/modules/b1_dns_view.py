@@ -15,18 +15,21 @@ version_added: "1.0.1"
 description:
   - Get, Create, Update and Delete DNS View on Infoblox BloxOne DDI. This module manages the DNS View object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   name:
     description:
       - Configures the name of object to fetch, add, update or remove from the system. User can also update the name as it is possible
@@ -103,7 +106,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 import json
 
@@ -145,7 +148,7 @@ def update_dns_view(data):
         payload['tags']=helper.flatten_dict_object('tags',data)
     
     endpoint  = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_dns_view(data):
     '''Creates a new BloxOne DDI DNS View object
@@ -190,8 +193,8 @@ def main():
     '''
     argument_spec = dict(
         name=dict(default='', type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         comment=dict(type='str'),
         tags=dict(type='list', elements='dict', default=[{}]),
         state=dict(type='str', default='present', choices=['present','absent','get'])
@@ -201,13 +204,14 @@ def main():
                   'get': get_dns_view,
                   'absent': delete_dns_view}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
@@ -15,18 +15,21 @@ version_added: "1.0.1"
 description:
   - Create, Update and Delete Address Block on Infoblox BloxOne DDI. This module manages the IPAM Address Block object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   address:
     description:
       - Configures the address of the address block to fetch, add, update or remove from the system. 
@@ -37,6 +40,7 @@ options:
   space:
     description:
       - Configures the name of IP Space containing the address block to fetch, add, update or remove from the system. 
+      - The ID of the IP Space (e.g. C(ipam/ip_space/...) as returned by the gather modules) can be given instead of its name, which saves its lookup.
     type: str
     required: true  
   name:
@@ -115,7 +119,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 import json
 
@@ -125,10 +129,8 @@ def get_address_block(data):
     connector = Request(data['host'], data['api_key'])
     helper = Utilities()
     if 'space' in data.keys() and data['space']!=None:
-        space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-        space = connector.get(space_endpoint)
-        if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-            space_ref = space[2]['results'][0]['id']
+        space_ref = connector.resolve('ipam/ip_space', data['space'])
+        if space_ref:
             if 'address' in data.keys() and data['address']!=None:
                 p_data = helper.normalize_ip(data['address'])
                 if(p_data[0]!='' and p_data[1]!=''):
@@ -185,7 +187,7 @@ def update_address_block(data):
     if 'tags' in data.keys() and data['tags']!=None:
         payload['tags']=helper.flatten_dict_object('tags',data) 
     endpoint = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_address_block(data):
     '''Creates a new BloxOne DDI Address Block object
@@ -206,10 +208,9 @@ def create_address_block(data):
             if('results' in address_block[2].keys() and len(address_block[2]['results']) > 0):
                 return update_address_block(data)
             else:
-                space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-                space = connector.get(space_endpoint)
-                if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-                    payload['space'] = space[2]['results'][0]['id']
+                space_ref = connector.resolve('ipam/ip_space', data['space'])
+                if space_ref:
+                    payload['space'] = space_ref
                 else:
                     return (True, False, {'status': '400', 'response': 'Error in fetching IP Space', 'data':data}) 
                 payload['address'] = f"{p_data[0]}/{p_data[1]}"
@@ -281,8 +282,8 @@ def main():
     '''
     argument_spec = dict(
         name=dict(default='', type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         address=dict(type='str'),
         space=dict(type='str'),
         comment=dict(type='str'),
@@ -294,13 +295,14 @@ def main():
                   'get': get_address_block,
                   'absent': delete_address_block}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
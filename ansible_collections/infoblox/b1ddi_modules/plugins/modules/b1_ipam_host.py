@@ -15,22 +15,26 @@ version_added: "1.0.1"
 description:
   -  Create, Update and Delete Hosts on Infoblox BloxOne DDI. This module manages the IPAM Host object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   addresses:
     description:
       - Configures the name of IP Space and the associated Address for the Host
         When fetching, the address field can be in the form “a.b.c.d”. 
+      - The ID of the IP Space (e.g. C(ipam/ip_space/...) as returned by the gather modules) can be given instead of its name, which saves the listing of the IP spaces.
     type: list
     required: true
   name:
@@ -99,8 +103,8 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
-from ..module_utils.b1ddi import Request, Utilities
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.b1ddi import Request, Utilities, is_ref
 import json
 
 def get_host(data):
@@ -113,6 +117,18 @@ def get_host(data):
         endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/host?_filter=name==',data['name'])
         return connector.get(endpoint)
 
+def host_addresses(connector, helper, data):
+    '''Returns the addresses of the host, listing the IP spaces only when
+    one of them is given by name
+    '''
+    aspace = []
+    if not all(is_ref('ipam/ip_space', k) for i in data['addresses'] for k in i):
+        result = connector.get("/api/ddi/v1/ipam/ip_space")
+        aspace = result[2].get("results") if isinstance(result[2], dict) else None
+        if not aspace:
+            return None
+    return helper.hostaddresses("addresses", data, aspace)
+
 def update_host(data):
     '''Updates the existing BloxOne DDI Host object
     '''
@@ -140,15 +156,8 @@ def update_host(data):
     if 'tags' in data.keys():
         payload['tags']=helper.flatten_dict_object('tags',data)
     if "addresses" in data.keys() and data["addresses"] != None:
-                    aspace = connector.get("/api/ddi/v1/ipam/ip_space")
-                    if (
-                        "results" in aspace[2].keys()
-                        and len(aspace[2]["results"]) > 0
-                    ):
-                        payload["addresses"] = helper.hostaddresses(
-                            "addresses", data, aspace[2]["results"]
-                        )
-                    else:
+                    payload["addresses"] = host_addresses(connector, helper, data)
+                    if payload["addresses"] is None:
                         return (
                             True,
                             False,
@@ -159,7 +168,7 @@ def update_host(data):
                             },
                         )
     endpoint  = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_host(data):
     '''Creates a new BloxOne DDI Host object
@@ -180,15 +189,8 @@ def create_host(data):
                 if 'tags' in data.keys():
                     payload['tags']=helper.flatten_dict_object('tags',data)
                 if "addresses" in data.keys() and data["addresses"] != None:
-                    aspace = connector.get("/api/ddi/v1/ipam/ip_space")
-                    if (
-                        "results" in aspace[2].keys()
-                        and len(aspace[2]["results"]) > 0
-                    ):
-                        payload["addresses"] = helper.hostaddresses(
-                            "addresses", data, aspace[2]["results"]
-                        )
-                    else:
+                    payload["addresses"] = host_addresses(connector, helper, data)
+                    if payload["addresses"] is None:
                         return (
                             True,
                             False,
@@ -223,8 +225,8 @@ def main():
     argument_spec = dict(
         name=dict(default='', type='str'),
         addresses=dict(type="list", elements="dict", default=[{}]),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         comment=dict(type='str'),
         tags=dict(type='list', elements='dict', default=[{}]),
         state=dict(type='str', default='present', choices=['present','absent','get'])
@@ -234,13 +236,14 @@ def main():
                   'get': get_host,
                   'absent': delete_host}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
@@ -16,18 +16,21 @@ version_added: "1.0.1"
 description:
   - Get, Create, Update and Delete IPv4 address reservation on Infoblox BloxOne DDI. This module manages the IPAM IPv4 address reservation object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   address:
     description:
       - Configures the address of the IPv4 address reservation to fetch, add, update or remove from the system. 
@@ -37,6 +40,7 @@ options:
   space:
     description:
       - Configures the name of IP Space containing the IPv4 address reservation to fetch, add, update or remove from the system. 
+      - The ID of the IP Space (e.g. C(ipam/ip_space/...) as returned by the gather modules) can be given instead of its name, which saves its lookup.
     type: str
     required: true  
   name:
@@ -117,7 +121,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 import json
 
@@ -127,10 +131,8 @@ def get_ipv4_reservation(data):
     connector = Request(data['host'], data['api_key'])
     helper = Utilities()
     if 'space' in data.keys() and data['space']!=None:
-        space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-        space = connector.get(space_endpoint)
-        if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-            space_ref = space[2]['results'][0]['id']
+        space_ref = connector.resolve('ipam/ip_space', data['space'])
+        if space_ref:
             if 'address' in data.keys() and data['address']!=None:
                 p_data = helper.normalize_ip(data['address'])
                 if(p_data[0]!='' and p_data[1]==''):
@@ -181,7 +183,7 @@ def update_ipv4_reservation(data):
     if 'tags' in data.keys() and data['tags']!=None:
         payload['tags']=helper.flatten_dict_object('tags',data) 
     endpoint = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
 
 def create_ipv4_reservation(data):
     '''Creates a new BloxOne DDI IPv4 address reservation object
@@ -196,11 +198,8 @@ def create_ipv4_reservation(data):
                 p_data = helper.normalize_ip(subnet)
             except:
                 return(True, False, {'status': '400', 'response': 'Invalid Syntax', 'data':data})
-            space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-            space = connector.get(space_endpoint)
-            if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-                space_ref = space[2]['results'][0]['id']   
-            else:
+            space_ref = connector.resolve('ipam/ip_space', data['space'])
+            if not space_ref:
                 return (True, False, {'status': '400', 'response': 'Error in fetching IP Space', 'data':data}) 
             if (p_data[0]!='' and p_data[1]!=''):   
                 subnet_endpoint = f"/api/ddi/v1/ipam/subnet?_filter=space=='{space_ref}' and address=='{p_data[0]}' and cidr=={p_data[1]}"        
@@ -227,10 +226,9 @@ def create_ipv4_reservation(data):
             if('results' in result[2].keys() and len(result[2]['results']) > 0):
                 return update_ipv4_reservation(data)
             else:
-                space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-                space = connector.get(space_endpoint)
-                if('results' in space[2].keys() and len(space[2]['results']) > 0):
-                    payload['space'] = space[2]['results'][0]['id']
+                space_ref = connector.resolve('ipam/ip_space', data['space'])
+                if space_ref:
+                    payload['space'] = space_ref
                 else:
                     return (True, False, {'status': '400', 'response': 'Error in fetching IP Space', 'data':data}) 
                 payload['address'] = str(p_data[0])
@@ -266,8 +264,8 @@ def main():
     '''Main entry point for module execution
     '''
     argument_spec = dict(
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         name=dict(type='str'),
         address=dict(type='str'),
         space=dict(type='str'),
@@ -280,13 +278,14 @@ def main():
                   'get': get_ipv4_reservation,
                   'absent': delete_ipv4_reservation}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
@@ -16,18 +16,21 @@ version_added: "1.0.1"
 description:
   - Create, Update and Delete the IPAM range on Infoblox BloxOne DDI. This module manages the IPAM IPAM range object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   start:
     description:
       - Configures the start address of the IPAM range to fetch, add, update or remove from the system. 
@@ -43,6 +46,7 @@ options:
   space:
     description:
       - Configures the name of IP Space containing the IPAM range to fetch, add, update or remove from the system. 
+      - The ID of the IP Space (e.g. C(ipam/ip_space/...) as returned by the gather modules) can be given instead of its name, which saves its lookup.
     type: str
     required: true 
   host:
@@ -118,7 +122,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 import json
 
@@ -128,10 +132,8 @@ def get_range(data):
     connector = Request(data['host'], data['api_key'])
     helper = Utilities()
     if 'space' in data.keys() and data['space']!=None:
-        space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-        space = connector.get(space_endpoint)
-        if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-            space_ref = space[2]['results'][0]['id']
+        space_ref = connector.resolve('ipam/ip_space', data['space'])
+        if space_ref:
             if 'start' in data.keys() and data['start']!=None:
                 start = helper.normalize_ip(data['start'])
                 if 'end' in data.keys() and data['end']!=None:
@@ -207,7 +209,10 @@ def update_range(data):
     else:
         new_end_address = helper.normalize_ip(data['end'])
 
-    reference = get_range(data)
+    has_dhcp_host = 'dhcp_host' in data.keys() and data['dhcp_host']!=None
+    reference, dhcp_host_ref = connector.parallel(
+        (get_range, data),
+        (connector.resolve, 'dhcp/host', data['dhcp_host']) if has_dhcp_host else None)
     if('results' in reference[2].keys() and len(reference[2]['results']) > 0):
         ref_id = reference[2]['results'][0]['id']
     else:
@@ -217,17 +222,15 @@ def update_range(data):
     payload['end'] = new_end_address[0]
     payload['name'] = data['name'] if 'name' in data.keys() else ''
     payload['comment'] = data['comment'] if 'comment' in data.keys() else ''
-    if 'dhcp_host' in data.keys() and data['dhcp_host']!=None:
-        endpoint = '{}\"{}\"'.format('/api/ddi/v1/dhcp/host?_filter=name==',data['dhcp_host'])
-        dhcp_host = connector.get(endpoint)
-        if ('results' in dhcp_host[2].keys() and len(dhcp_host[2]['results']) > 0):
-            payload['dhcp_host'] = dhcp_host[2]['results'][0]['id']
+    if has_dhcp_host:
+        if dhcp_host_ref:
+            payload['dhcp_host'] = dhcp_host_ref
         else:
             return (True, False, {'status': '400', 'response': 'Error in fetching On-prem host', 'data':data})
     if 'tags' in data.keys() and data['tags']!=None:
         payload['tags']=helper.flatten_dict_object('tags',data) 
     endpoint = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_range(data):
     '''Creates a new BloxOne DDI IPAM range object
@@ -247,17 +250,17 @@ def create_range(data):
             if('results' in range[2].keys() and len(range[2]['results']) > 0):
                 return update_range(data)
             else:
-                space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-                space = connector.get(space_endpoint)
-                if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-                    payload['space'] = space[2]['results'][0]['id']
+                has_dhcp_host = 'dhcp_host' in data.keys() and data['dhcp_host']!=None
+                space_ref, dhcp_host_ref = connector.parallel(
+                    (connector.resolve, 'ipam/ip_space', data['space']),
+                    (connector.resolve, 'dhcp/host', data['dhcp_host']) if has_dhcp_host else None)
+                if space_ref:
+                    payload['space'] = space_ref
                 else:
                     return (True, False, {'status': '400', 'response': 'Error in fetching IP Space', 'data':data}) 
-                if 'dhcp_host' in data.keys() and data['dhcp_host']!=None:
-                    endpoint = '{}\"{}\"'.format('/api/ddi/v1/dhcp/host?_filter=name==',data['dhcp_host'])
-                    dhcp_host = connector.get(endpoint)
-                    if ('results' in dhcp_host[2].keys() and len(dhcp_host[2]['results']) > 0):
-                        payload['dhcp_host'] = dhcp_host[2]['results'][0]['id']
+                if has_dhcp_host:
+                    if dhcp_host_ref:
+                        payload['dhcp_host'] = dhcp_host_ref
                     else:
                         return (True, False, {'status': '400', 'response': 'Error in fetching On-prem host', 'data':data})
                 payload['start'] = data['start']
@@ -295,8 +298,8 @@ def main():
     '''
     argument_spec = dict(
         name=dict(type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         start=dict(type='str'),
         end=dict(type='str'),
         space=dict(type='str'),
@@ -310,13 +313,14 @@ def main():
                   'get': get_range,
                   'absent': delete_range}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
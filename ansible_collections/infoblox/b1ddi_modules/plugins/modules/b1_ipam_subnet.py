@@ -16,18 +16,21 @@ version_added: "1.1.2"
 description:
   - Create, Update and Delete Subnets on Infoblox BloxOne DDI. This module manages the IPAM Subnet object using BloxOne REST APIs.
 requirements:
-  - requests
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
 options:
   api_key:
     description:
       - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: str
-    required: true
+    required: false
   host:
     description:
       - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
     type: dict
-    required: true
+    required: false
   address:
     description:
       - Configures the address of the subnet to fetch, add, update or remove from the system. 
@@ -38,6 +41,7 @@ options:
   space:
     description:
       - Configures the name of IP Space containing the subnet to fetch, add, update or remove from the system. 
+      - The ID of the IP Space (e.g. C(ipam/ip_space/...) as returned by the gather modules) can be given instead of its name, which saves its lookup.
     type: str
     required: true  
   host:
@@ -52,6 +56,7 @@ options:
     description:
       - Configures the DHCP options associated with the subnet.
       - note: routers option supports first|last as special command to assign IP based on subnet
+      - Options are given by name or by code number.
     type: list
   tags:
     description:
@@ -130,7 +135,7 @@ EXAMPLES = '''
 
 RETURN = ''' # '''
 
-from ansible.module_utils.basic import *
+from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.b1ddi import Request, Utilities
 import json
 
@@ -140,10 +145,8 @@ def get_subnet(data):
     connector = Request(data['host'], data['api_key'])
     helper = Utilities()
     if 'space' in data.keys() and data['space']!=None:
-        space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-        space = connector.get(space_endpoint)
-        if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-            space_ref = space[2]['results'][0]['id']
+        space_ref = connector.resolve('ipam/ip_space', data['space'])
+        if space_ref:
             if 'address' in data.keys() and data['address']!=None:
                 address = helper.normalize_address(data['address'])    
                 if address:
@@ -196,7 +199,13 @@ def update_subnet(data):
     else:
         new_address = helper.normalize_ip(data['address'])
 
-    reference = get_subnet(data)
+    has_dhcp_host = 'dhcp_host' in data.keys() and data['dhcp_host']!=None
+    has_dhcp_options = "dhcp_options" in data.keys() and data["dhcp_options"] != None
+    option_names = [k for i in data["dhcp_options"] for k in i] if has_dhcp_options else []
+    reference, dhcp_host_ref, dhcp_option_codes = connector.parallel(
+        (get_subnet, data),
+        (connector.resolve_dhcp_host, data['dhcp_host']) if has_dhcp_host else None,
+        (connector.option_codes, option_names) if has_dhcp_options else None)
     if('results' in reference[2].keys() and len(reference[2]['results']) > 0):
         ref_id = reference[2]['results'][0]['id']
     else:
@@ -208,31 +217,15 @@ def update_subnet(data):
         payload['name'] = data['name']
     if 'comment' in data.keys() and data.get('comment'):
         payload['comment'] = data['comment']
-    if 'dhcp_host' in data.keys() and data['dhcp_host']!=None:
-        endpoint = '{}\"{}\"'.format('/api/ddi/v1/dhcp/host?_filter=name==',data['dhcp_host'])
-        dhcp_host = connector.get(endpoint)
-        if ('results' in dhcp_host[2].keys() and len(dhcp_host[2]['results']) > 0):
-            payload['dhcp_host'] = dhcp_host[2]['results'][0]['id']
+    if has_dhcp_host:
+        if dhcp_host_ref:
+            payload['dhcp_host'] = dhcp_host_ref
         else:
-            # Search for HA_Group if DHCP host is not found.
-            endpoint = '{}\"{}\"'.format('/api/ddi/v1/dhcp/ha_group?_filter=name==',data['dhcp_host'])
-            dhcp_host = connector.get(endpoint)
-            if ('results' in dhcp_host[2].keys() and len(dhcp_host[2]['results']) > 0):
-                payload['dhcp_host'] = dhcp_host[2]['results'][0]['id']
-            else:
-                return (True, False, {'status': '400', 'response': 'Error in fetching On-prem hosts or host HA group', 'data':data})
+            return (True, False, {'status': '400', 'response': 'Error in fetching On-prem hosts or host HA group', 'data':data})
     if 'tags' in data.keys() and data['tags']!=None:
         payload['tags']=helper.flatten_dict_object('tags',data)
-    if "dhcp_options" in data.keys() and data["dhcp_options"] != None:
-                    dhcp_option_codes = connector.get("/api/ddi/v1/dhcp/option_code")
-                    if (
-                        "results" in dhcp_option_codes[2].keys()
-                        and len(dhcp_option_codes[2]["results"]) > 0
-                    ):
-                        payload["dhcp_options"] = helper.dhcp_options(
-                            "dhcp_options", data, dhcp_option_codes[2]["results"]
-                        )
-                    else:
+    if has_dhcp_options:
+                    if dhcp_option_codes[0]:
                         return (
                             True,
                             False,
@@ -242,8 +235,14 @@ def update_subnet(data):
                                 "data": data,
                             },
                         )
+                    unknown = dhcp_option_codes[2].missing(option_names)
+                    if unknown:
+                        return (True, False, {'status': '400', 'response': 'Unknown DHCP options: {}'.format(', '.join(unknown)), 'data': data})
+                    payload["dhcp_options"] = helper.dhcp_options(
+                        "dhcp_options", data, dhcp_option_codes[2]
+                    )
     endpoint = '{}{}'.format('/api/ddi/v1/',ref_id)
-    return connector.update(endpoint, payload)
+    return connector.update(endpoint, payload, current=reference[2]['results'][0])
     
 def create_subnet(data):
     '''Creates a new BloxOne DDI Subnet object
@@ -264,40 +263,29 @@ def create_subnet(data):
             if('results' in subnet[2].keys() and len(subnet[2]['results']) > 0):
                 return update_subnet(data)
             else:
-                space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-                space = connector.get(space_endpoint)
-                if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-                    payload['space'] = space[2]['results'][0]['id']
+                has_dhcp_host = 'dhcp_host' in data.keys() and data['dhcp_host']!=None
+                has_dhcp_options = "dhcp_options" in data.keys() and data["dhcp_options"] != None
+                option_names = [k for i in data["dhcp_options"] for k in i] if has_dhcp_options else []
+                space_ref, dhcp_host_ref, dhcp_option_codes = connector.parallel(
+                    (connector.resolve, 'ipam/ip_space', data['space']),
+                    (connector.resolve_dhcp_host, data['dhcp_host']) if has_dhcp_host else None,
+                    (connector.option_codes, option_names) if has_dhcp_options else None)
+                if space_ref:
+                    payload['space'] = space_ref
                 else:
                     return (True, False, {'status': '400', 'response': 'Error in fetching IP Space', 'data':data}) 
-                if 'dhcp_host' in data.keys() and data['dhcp_host']!=None:
-                    endpoint = '{}\"{}\"'.format('/api/ddi/v1/dhcp/host?_filter=name==',data['dhcp_host'])
-                    dhcp_host = connector.get(endpoint)
-                    if ('results' in dhcp_host[2].keys() and len(dhcp_host[2]['results']) > 0):
-                        payload['dhcp_host'] = dhcp_host[2]['results'][0]['id']
+                if has_dhcp_host:
+                    if dhcp_host_ref:
+                        payload['dhcp_host'] = dhcp_host_ref
                     else:
-                        # Search for HA_Group if DHCP host is not found.
-                        endpoint = '{}\"{}\"'.format('/api/ddi/v1/dhcp/ha_group?_filter=name==',data['dhcp_host'])
-                        dhcp_host = connector.get(endpoint)
-                        if ('results' in dhcp_host[2].keys() and len(dhcp_host[2]['results']) > 0):
-                            payload['dhcp_host'] = dhcp_host[2]['results'][0]['id']
-                        else:
-                            return (True, False, {'status': '400', 'response': 'Error in fetching On-prem hosts or host HA group', 'data':data})
+                        return (True, False, {'status': '400', 'response': 'Error in fetching On-prem hosts or host HA group', 'data':data})
                 payload['address'] = f"{p_data[0]}/{p_data[1]}"
                 payload['name'] = data['name'] if 'name' in data.keys() else ''
                 payload['comment'] = data['comment'] if 'comment' in data.keys() else ''
                 if 'tags' in data.keys() and data['tags']!=None:
                     payload['tags']=helper.flatten_dict_object('tags',data)                
-                if "dhcp_options" in data.keys() and data["dhcp_options"] != None:
-                    dhcp_option_codes = connector.get("/api/ddi/v1/dhcp/option_code")
-                    if (
-                        "results" in dhcp_option_codes[2].keys()
-                        and len(dhcp_option_codes[2]["results"]) > 0
-                    ):
-                        payload["dhcp_options"] = helper.dhcp_options(
-                            "dhcp_options", data, dhcp_option_codes[2]["results"]
-                        )
-                    else:
+                if has_dhcp_options:
+                    if dhcp_option_codes[0]:
                         return (
                             True,
                             False,
@@ -307,6 +295,12 @@ def create_subnet(data):
                                 "data": data,
                             },
                         )
+                    unknown = dhcp_option_codes[2].missing(option_names)
+                    if unknown:
+                        return (True, False, {'status': '400', 'response': 'Unknown DHCP options: {}'.format(', '.join(unknown)), 'data': data})
+                    payload["dhcp_options"] = helper.dhcp_options(
+                        "dhcp_options", data, dhcp_option_codes[2]
+                    )
                 return connector.create('/api/ddi/v1/ipam/subnet', payload)
     else:
         return(True, False, {'status': '400', 'response': 'Address or IP Space not defined','data':data})                
@@ -345,11 +339,8 @@ def next_available_subnet(data):
         p_data = helper.normalize_ip(subnet_data['parent_block'])
         if(p_data[0]=='' or p_data[1]==''):
             return(True, False, {'status': '400', 'response': 'Invalid Syntax for parent block','data':data}) 
-        space_endpoint = '{}\"{}\"'.format('/api/ddi/v1/ipam/ip_space?_filter=name==',data['space'])
-        space = connector.get(space_endpoint)
-        if ('results' in space[2].keys() and len(space[2]['results']) > 0):
-            space_ref = space[2]['results'][0]['id']
-        else:
+        space_ref = connector.resolve('ipam/ip_space', data['space'])
+        if not space_ref:
             return(True, False, {'status': '400', 'response': 'Error in fetching IP Space', 'data':data})
         endpoint = f"/api/ddi/v1/ipam/address_block?_filter=space=='{space_ref}' and address=='{p_data[0]}' and cidr=={p_data[1]}"
         address_block = connector.get(endpoint)
@@ -383,8 +374,8 @@ def main():
     '''
     argument_spec = dict(
         name=dict(default='', type='str'),
-        api_key=dict(required=True, type='str'),
-        host=dict(required=True, type='str'),
+        api_key=dict(type='str'),
+        host=dict(type='str'),
         address=dict(type='str'),
         space=dict(type='str'),
         dhcp_host=dict(type='str'),
@@ -398,13 +389,14 @@ def main():
                   'get': get_subnet,
                   'absent': delete_subnet}
 
-    module = AnsibleModule(argument_spec=argument_spec)
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
     (is_error, has_changed, result) = choice_map.get(module.params['state'])(module.params)
 
     if not is_error:
-        module.exit_json(changed=has_changed, meta=result)
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
     else:
-        module.fail_json(msg='Operation failed', meta=result)
+        module.fail_json(msg='Operation failed', meta=result, **Request.metrics())
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,239 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: b1_ipam_subnet_bulk
+short_description: Configure many subnets on Infoblox BloxOne DDI in one task
+version_added: "1.1.0"
+description:
+  - Creates, updates and deletes a list of subnets in one task.
+  - The IP spaces, DHCP hosts and DHCP option codes of all the subnets are resolved once and the existing subnets
+    of every IP space are listed once. The changes are worked out on the controller and sent concurrently.
+  - Every subnet gets its own result. Subnets that fail do not stop the others, the task fails once all are done.
+requirements:
+  - requests (optional). Without it, or with the C(B1DDI_TRANSPORT) environment variable set to C(urls),
+    the API is called with ansible's open_url.
+options:
+  api_key:
+    description:
+      - Configures the API token for authentication against Infoblox BloxOne patform.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
+    type: str
+    required: false
+  host:
+    description:
+      - Configures the Infoblox BloxOne host URL.
+      - Not required when the task runs with the C(infoblox.b1ddi_modules.bloxone) httpapi connection.
+    type: str
+    required: false
+  subnets:
+    description:
+      - The subnets to configure. Each subnet takes the C(address) in the form "a.b.c.d/n" and the C(space) name,
+        and optionally the C(name), C(comment), C(dhcp_host), C(dhcp_options), C(tags) and C(state) of the
+        M(b1_ipam_subnet) module.
+      - A subnet is matched with an existing one by IP space and network address, a different prefix length
+        updates its CIDR. The other fields are only updated when given.
+    type: list
+    elements: dict
+    required: true
+  workers:
+    description:
+      - Number of writes sent at once. Defaults to the C(B1DDI_POOL_SIZE) environment variable, or 10.
+    type: int
+  state:
+    description:
+      - Configures the state of the subnets that do not set their own. When this value is set to C(present),
+        the subnets are configured on the platform and when this value is set to C(absent) they are removed
+        (if necessary) from the platform.
+    type: str
+    default: present
+    choices:
+      - present
+      - absent
+'''
+
+EXAMPLES = '''
+    - name: Provision the subnets of a site
+      b1_ipam_subnet_bulk:
+        api_key: "{{ api_key }}"
+        host: "{{ host }}"
+        subnets:
+          - address: 10.1.0.0/24
+            space: site-1
+            name: users
+            dhcp_host: dhcp-site-1
+            dhcp_options:
+              - routers: first
+              - domain-name-servers: 10.0.0.53
+          - {address: 10.1.1.0/24, space: site-1, name: voice, tags: [{site: site-1}]}
+          - {address: 10.1.9.0/24, space: site-1, state: absent}
+'''
+
+RETURN = ''' # '''
+
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.b1ddi import Request, RequestError, Utilities, build_query, payload_changes
+
+SUBNET_FIELDS = ['id', 'address', 'cidr', 'space', 'name', 'comment', 'dhcp_host', 'dhcp_options', 'tags']
+
+def load_subnets(connector, space_ref):
+    '''Lists the subnets of the IP space, one page at a time
+    '''
+    endpoint = build_query('/api/ddi/v1/ipam/subnet', SUBNET_FIELDS, {'space': space_ref})
+    try:
+        return list(connector.paginate(endpoint))
+    except RequestError as e:
+        return e
+
+def desired_subnet(item, refs, catalog, helper):
+    '''Returns the subnet payload of the item, with the IP space, DHCP host and
+    option codes resolved, or the error message
+    '''
+    payload = {'space': refs['space'][item['space']]}
+    if not payload['space']:
+        return (None, 'Error in fetching IP Space')
+    (address, cidr) = helper.normalize_ip(item['address'])
+    payload['address'] = address
+    payload['cidr'] = int(cidr)
+    for field in ('name', 'comment'):
+        if item.get(field) is not None:
+            payload[field] = item[field]
+    if item.get('dhcp_host') is not None:
+        payload['dhcp_host'] = refs['dhcp_host'][item['dhcp_host']]
+        if not payload['dhcp_host']:
+            return (None, 'Error in fetching On-prem hosts or host HA group')
+    if item.get('tags') is not None:
+        payload['tags'] = helper.flatten_dict_object('tags', item)
+    option_names = [k for i in item.get('dhcp_options') or [] for k in i]
+    if item.get('dhcp_options') is not None and not option_names:
+        # [] and the [{}] default of b1_ipam_subnet both mean no options
+        payload['dhcp_options'] = []
+    elif item.get('dhcp_options') is not None:
+        if catalog is None or catalog[0]:
+            return (None, 'Error in fetching DHCP option codes')
+        unknown = catalog[2].missing(option_names)
+        if unknown:
+            return (None, 'Unknown DHCP options: {}'.format(', '.join(unknown)))
+        payload['dhcp_options'] = helper.dhcp_options('dhcp_options', dict(item, address='{}/{}'.format(address, cidr)), catalog[2])
+    return (payload, None)
+
+def subnet_changes(existing, payload):
+    '''Returns the fields of the existing subnet to patch to match the payload
+    '''
+    return payload_changes(existing, dict((k, v) for k, v in payload.items() if k not in ('space', 'address')))
+
+def reconcile_subnets(data):
+    '''Creates, updates and deletes the subnets of the task, with one lookup
+    per IP space, DHCP host and the option codes, and one listing per IP space
+    '''
+    connector = Request(data['host'], data['api_key'])
+    helper = Utilities()
+    items = []
+    results = []
+    for i, item in enumerate(data['subnets']):
+        result = {'address': item.get('address') if isinstance(item, dict) else None,
+                  'space': item.get('space') if isinstance(item, dict) else None}
+        results.append(result)
+        if not isinstance(item, dict) or not all(item.get(k) for k in ('space', 'address')):
+            result.update(action='failed', response='Address or IP Space not defined')
+            continue
+        state = item.get('state') or data['state']
+        p_data = helper.normalize_ip(str(item['address']))
+        if p_data[0] == '' or not str(p_data[1]).isdigit():
+            result.update(action='failed', response='Incorrect address definition')
+        elif state not in ('present', 'absent'):
+            result.update(action='failed', response='Invalid state {}'.format(state))
+        else:
+            items.append((i, dict(item, state=state)))
+
+    spaces = sorted(set(item['space'] for _, item in items))
+    hosts = sorted(set(item['dhcp_host'] for _, item in items if item['state'] == 'present' and item.get('dhcp_host')))
+    option_names = sorted(set(k for _, item in items if item['state'] == 'present'
+                              for o in item.get('dhcp_options') or [] for k in o))
+    resolved = connector.parallel(*([(connector.resolve, 'ipam/ip_space', space) for space in spaces] +
+                                    [(connector.resolve_dhcp_host, host) for host in hosts] +
+                                    [(connector.option_codes, option_names) if option_names else None]))
+    refs = {'space': dict(zip(spaces, resolved[:len(spaces)])),
+            'dhcp_host': dict(zip(hosts, resolved[len(spaces):len(spaces) + len(hosts)]))}
+    catalog = resolved[-1]
+
+    space_refs = sorted(set(ref for ref in refs['space'].values() if ref))
+    existing = {}
+    for listing in connector.parallel(*[(load_subnets, connector, ref) for ref in space_refs]):
+        if isinstance(listing, RequestError):
+            return listing.result
+        for subnet in listing:
+            existing[(subnet.get('space'), subnet.get('address'))] = subnet
+
+    calls = []
+    for i, item in items:
+        result = results[i]
+        if item['state'] == 'absent':
+            subnet = existing.get((refs['space'][item['space']], helper.normalize_ip(item['address'])[0]))
+            if subnet is None:
+                result['action'] = 'unchanged'
+            else:
+                result.update(action='deleted', id=subnet['id'])
+                calls.append((i, (connector.delete, '/api/ddi/v1/{}'.format(subnet['id']))))
+            continue
+        (payload, error) = desired_subnet(item, refs, catalog, helper)
+        if error:
+            result.update(action='failed', response=error)
+            continue
+        subnet = existing.get((payload['space'], payload['address']))
+        if subnet is None:
+            payload['address'] = '{}/{}'.format(payload.pop('address'), payload.pop('cidr'))
+            payload.setdefault('name', '')
+            payload.setdefault('comment', '')
+            result['action'] = 'created'
+            calls.append((i, (connector.create, '/api/ddi/v1/ipam/subnet', payload)))
+            continue
+        result['id'] = subnet['id']
+        patch = subnet_changes(subnet, payload)
+        if patch:
+            result.update(action='updated', changes=sorted(patch))
+            calls.append((i, (connector.update, '/api/ddi/v1/{}'.format(subnet['id']), patch)))
+        else:
+            result['action'] = 'unchanged'
+
+    if calls and not data.get('check_mode'):
+        for (i, _), response in zip(calls, connector.parallel(*[call for _, call in calls], workers=data['workers'])):
+            if response[0]:
+                results[i].update(action='failed', response=response[2])
+            elif results[i]['action'] == 'created':
+                results[i]['id'] = (response[2].get('result') or {}).get('id')
+
+    summary = dict((action, sum(1 for r in results if r['action'] == action))
+                   for action in ('created', 'updated', 'deleted', 'unchanged', 'failed'))
+    changed = any(r['action'] in ('created', 'updated', 'deleted') for r in results)
+    return (summary['failed'] > 0, changed, dict(summary, results=results))
+
+
+def main():
+    '''Main entry point for module execution
+    '''
+    argument_spec = dict(
+        api_key=dict(type='str'),
+        host=dict(type='str'),
+        subnets=dict(type='list', elements='dict', required=True),
+        workers=dict(type='int'),
+        state=dict(type='str', default='present', choices=['present','absent'])
+    )
+
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    Request.bind(module)
+    (is_error, has_changed, result) = reconcile_subnets(dict(module.params, check_mode=module.check_mode))
+
+    if not is_error:
+        module.exit_json(changed=has_changed, meta=result, **Request.metrics())
+    else:
+        module.fail_json(msg='Operation failed', changed=has_changed, meta=result, **Request.metrics())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'tools')))
+
+from mock_server import MockServer  # noqa: E402
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    '''Keeps the caches of every test in its own directory, with a fresh
+    module run state
+    '''
+    monkeypatch.setenv('B1DDI_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.delenv('B1DDI_METRICS', raising=False)
+    monkeypatch.delenv('B1DDI_METRICS_SPOOL', raising=False)
+    Request.unbind()
+    yield
+    Request.unbind()
+
+
+@pytest.fixture
+def mock_server():
+    '''Mock BloxOne API, served from a background thread for the test
+    '''
+    with MockServer() as server:
+        yield server
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible_collections.infoblox.b1ddi_modules.plugins.lookup.bloxone import LookupModule
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request
+
+
+@pytest.fixture
+def lookup(mock_server):
+    '''Runs the lookup against the mock server, which holds two IP spaces
+    '''
+    for name in ('sp1', 'sp2'):
+        mock_server.add('ipam/ip_space', {'name': name})
+    provider = {'host': mock_server.url, 'api_key': 'test'}
+    return lambda *terms, **kwargs: LookupModule().run(list(terms), provider=provider, **kwargs)
+
+
+def test_repeated_lookup_is_served_from_memory(lookup, mock_server):
+    first = lookup('ipam/ip_space', fields=['name'])
+    mock_server.reset_stats()
+    assert lookup('ipam/ip_space', fields=['name']) == first
+    assert mock_server.stats['requests'] == 0
+    first[0]['name'] = 'changed'
+    assert sorted(s['name'] for s in lookup('ipam/ip_space', fields=['name'])) == ['sp1', 'sp2']
+
+
+def test_memo_is_per_query(lookup, mock_server):
+    lookup('ipam/ip_space', fields=['name'])
+    mock_server.reset_stats()
+    lookup('ipam/ip_space', fields=['name'], filters={'name': 'sp1'})
+    lookup('ipam/ip_space', fields=['name'], page_size=1)
+    lookup('ipam/ip_space', fields=['name'], memo=False)
+    # One call per page of one object, the last one empty
+    assert mock_server.stats['calls'] == {'GET /api/ddi/v1/ipam/ip_space': 1 + 3 + 1}
+
+
+def test_memo_follows_the_cache_ttl(lookup, mock_server, monkeypatch):
+    monkeypatch.setenv('B1DDI_CACHE_TTL', '0')
+    lookup('ipam/ip_space')
+    lookup('ipam/ip_space')
+    assert mock_server.stats['calls']['GET /api/ddi/v1/ipam/ip_space'] == 2
+
+
+def test_repeated_path_is_fetched_once(lookup, mock_server):
+    spaces = lookup('ipam/ip_space', 'ipam/ip_space', memo=False)
+    assert len(spaces) == 4 and spaces[:2] == spaces[2:]
+    assert mock_server.stats['calls']['GET /api/ddi/v1/ipam/ip_space'] == 1
+
+
+def test_count_only(lookup, mock_server, monkeypatch):
+    sent = []
+    send = Request._send
+    monkeypatch.setattr(Request, '_send', lambda self, method, endpoint, *args, **kwargs:
+                        sent.append(endpoint) or send(self, method, endpoint, *args, **kwargs))
+    counts = lookup('ipam/ip_space', count_only=True, filters=[{}, {'name': 'sp1'}, {'name': 'sp3'}], page_size=1)
+    assert counts == [2, 1, 0]
+    assert sent and all('_fields=id' in endpoint for endpoint in sent)
+
+
+def test_count_only_and_output_file_exclude_each_other(lookup, tmp_path):
+    with pytest.raises(AnsibleError):
+        lookup('ipam/ip_space', count_only=True, output_file=str(tmp_path / 'spaces.ndjson'))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import (
+    build_query, filter_expression, filter_literal)
+
+
+def test_filter_literal():
+    assert filter_literal(None) == 'null'
+    assert filter_literal(True) == 'true'
+    assert filter_literal(24) == '24'
+    assert filter_literal('24') == '24'
+    assert filter_literal('24', text=True) == "'24'"
+    assert filter_literal("it's") == "'it\\'s'"
+    assert filter_literal('a\\b') == "'a\\\\b'"
+
+
+def test_filter_expression_operators():
+    assert filter_expression({'name': 'a'}) == "name=='a'"
+    assert filter_expression({'type': ['A', 'AAAA']}) == "type in ['A', 'AAAA']"
+    assert filter_expression({'cidr': {'>=': 16, '<': 24}}) == 'cidr>=16 and cidr<24'
+    assert filter_expression({'name': {'~': 'web'}, 'comment': {'!=': None}}) == "name~'web' and comment!=null"
+    assert filter_expression({'or': [{'name': 'a'}, {'name': 'b'}]}) == "((name=='a') or (name=='b'))"
+    assert filter_expression({'or': [{'name': 'a'}]}) == "(name=='a')"
+
+
+def test_filter_expression_invalid():
+    with pytest.raises(ValueError):
+        filter_expression({'name': {'like': 'a'}})
+    with pytest.raises(ValueError):
+        filter_expression({'or': {'name': 'a'}})
+
+
+def test_build_query_encodes_the_parameters():
+    endpoint = build_query('/api/ddi/v1/ipam/ip_space', ['id', 'name'], {'name': 'a&b#"c'}, order_by='name',
+                           limit=1)
+    assert endpoint == ("/api/ddi/v1/ipam/ip_space?_fields=id,name&_filter=name%3D%3D%27a%26b%23%22c%27"
+                        "&_order_by=name&_limit=1")
+    assert build_query('/api/ddi/v1/ipam/ip_space') == '/api/ddi/v1/ipam/ip_space'
+    assert build_query('/api/ddi/v1/dns/record?_limit=5', tfilters={'site': 'x'}) == \
+        "/api/ddi/v1/dns/record?_limit=5&_tfilter=site%3D%3D%27x%27"
+    assert build_query('/api/ddi/v1/ipam/ip_space', filters={'name': '2024'}, text=True) == \
+        "/api/ddi/v1/ipam/ip_space?_filter=name%3D%3D%272024%27"
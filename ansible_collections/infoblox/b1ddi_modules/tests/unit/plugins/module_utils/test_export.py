@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import gzip
+import hashlib
+import json
+
+import pytest
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request
+
+ENDPOINT = '/api/ddi/v1/ipam/ip_space'
+
+
+@pytest.fixture
+def connector(mock_server):
+    for i in range(25):
+        mock_server.add('ipam/ip_space', {'name': 'sp{:02d}'.format(i)})
+    return Request(mock_server.url, 'test')
+
+
+@pytest.mark.parametrize('name,opener', [('spaces.ndjson', open), ('spaces.ndjson.gz', gzip.open)])
+def test_export(connector, tmp_path, name, opener):
+    path = str(tmp_path / name)
+    (is_error, changed, result) = connector.export(ENDPOINT, path, page_size=10)
+    with opener(path, 'rb') as f:
+        content = f.read()
+    assert (is_error, changed, result['count'], result['path']) == (False, False, 25, path)
+    assert result['digest'] == 'sha256:{}'.format(hashlib.sha256(content).hexdigest())
+    assert sorted(json.loads(line)['name'] for line in content.splitlines()) == ['sp{:02d}'.format(i) for i in range(25)]
+    assert [p.name for p in tmp_path.iterdir() if p.name != 'cache'] == [name]
+
+
+def test_failed_listing_leaves_no_file(connector, mock_server, tmp_path):
+    mock_server.inject_error(400, method='GET')
+    (is_error, _, result) = connector.export(ENDPOINT, str(tmp_path / 'spaces.ndjson'), page_size=10)
+    assert is_error and result['status'] == 400
+    assert [p.name for p in tmp_path.iterdir() if p.name != 'cache'] == []
+
+
+def test_failed_write_leaves_no_file(connector, tmp_path):
+    (tmp_path / 'spaces.ndjson').mkdir()
+    (is_error, _, result) = connector.export(ENDPOINT, str(tmp_path / 'spaces.ndjson'), page_size=10)
+    assert is_error and result['response'].startswith('Cannot write')
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name != 'cache') == ['spaces.ndjson']
+    (is_error, _, result) = connector.export(ENDPOINT, str(tmp_path / 'missing' / 'spaces.ndjson'))
+    assert is_error and result['response'].startswith('Cannot write')
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request
+
+ENDPOINT = '/api/ddi/v1/ipam/ip_space'
+
+
+@pytest.fixture
+def connector(mock_server):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    Request.begin()
+    return Request(mock_server.url, 'test')
+
+
+def gets(server):
+    return server.stats['calls'].get('GET ' + ENDPOINT, 0)
+
+
+def test_endpoint_is_read_once_per_run(connector, mock_server):
+    first = connector.get(ENDPOINT)
+    first[2]['results'].append('changed')
+    assert len(connector.get(ENDPOINT)[2]['results']) == 1
+    assert gets(mock_server) == 1
+    Request.begin()
+    connector.get(ENDPOINT)
+    assert gets(mock_server) == 2
+
+
+def test_write_drops_the_responses(connector, mock_server):
+    connector.get(ENDPOINT)
+    assert not connector.create(ENDPOINT, {'name': 'sp2'})[0]
+    assert len(connector.get(ENDPOINT)[2]['results']) == 2
+    assert gets(mock_server) == 2
+
+
+def test_errors_are_not_kept(connector, mock_server):
+    mock_server.inject_error(400, method='GET')
+    assert connector.get(ENDPOINT)[0]
+    assert not connector.get(ENDPOINT)[0]
+
+
+def test_pages_are_not_kept(connector, mock_server):
+    connector.get_all(ENDPOINT)
+    connector.get_all(ENDPOINT)
+    assert gets(mock_server) == 2
+    assert Request.invocation.responses == {}
+
+
+def test_nothing_is_kept_outside_a_module_run(mock_server):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    connector = Request(mock_server.url, 'test')
+    connector.get(ENDPOINT)
+    connector.get(ENDPOINT)
+    assert gets(mock_server) == 2
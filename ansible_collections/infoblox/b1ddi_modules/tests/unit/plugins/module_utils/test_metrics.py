@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request
+
+
+def test_module_result_only_holds_totals(mock_server, tmp_path, monkeypatch):
+    monkeypatch.setenv('B1DDI_METRICS', 'true')
+    monkeypatch.setenv('B1DDI_METRICS_SPOOL', str(tmp_path / 'spool'))
+    (tmp_path / 'spool').mkdir()
+    mock_server.inject_error(503, method='GET')
+    connector = Request(mock_server.url, 'test')
+    connector.get('/api/ddi/v1/ipam/ip_space')
+    connector.get('/api/ddi/v1/ipam/ip_space/00000000-0000-0000-0000-000000000000')
+    metrics = Request.metrics()['b1_metrics']
+    assert 'requests' not in metrics
+    assert (metrics['calls'], metrics['retries'], metrics['statuses'], metrics['spooled']) == (2, 1, {'200': 1, '404': 1}, True)
+    assert metrics['latency']['p50'] <= metrics['latency']['p99']
+    calls = [json.loads(line) for f in (tmp_path / 'spool').iterdir() for line in f.read_text().splitlines()]
+    assert sorted((c['endpoint'], c['status']) for c in calls) == [('/api/ddi/v1/ipam/ip_space', 200),
+                                                                  ('/api/ddi/v1/ipam/ip_space/{id}', 404)]
+    assert Request.metrics()['b1_metrics']['calls'] == 0
+
+
+def test_metrics_are_off_by_default(mock_server):
+    Request(mock_server.url, 'test').get('/api/ddi/v1/ipam/ip_space')
+    assert Request.metrics() == {}
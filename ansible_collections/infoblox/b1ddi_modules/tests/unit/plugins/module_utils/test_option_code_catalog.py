@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import OptionCodeCatalog, Request
+
+
+def test_option_code_catalog(tmp_path):
+    catalog = OptionCodeCatalog('https://example.com', 'account', cache_dir=str(tmp_path), ttl=0)
+    codes = [
+        {'id': 'dhcp/option_code/1', 'name': 'routers', 'code': 3, 'option_space': 'dhcp/option_space/dhcp4'},
+        {'id': 'dhcp/option_code/2', 'name': 'routers', 'code': 3, 'option_space': 'dhcp/option_space/custom'},
+        {'id': 'dhcp/option_code/3', 'name': 'domain-name', 'code': 15, 'option_space': 'dhcp/option_space/dhcp4'},
+    ]
+    catalog.store(codes)
+    assert catalog.get('routers')['id'] == 'dhcp/option_code/1'
+    assert catalog.get('15')['id'] == 'dhcp/option_code/3'
+    assert catalog.get(3, 'dhcp/option_space/custom')['id'] == 'dhcp/option_code/2'
+    assert catalog.get('routers', 'dhcp/option_space/custom')['id'] == 'dhcp/option_code/2'
+    assert catalog.get('ntp-servers') is None
+    assert catalog.missing(['routers', 'ntp-servers', '15']) == ['ntp-servers']
+
+
+def test_option_codes_are_downloaded_once(mock_server):
+    connector = Request(mock_server.url, 'test')
+    (is_error, _, catalog) = connector.option_codes(['routers'])
+    assert not is_error and catalog.get('routers')['code'] == 3
+    mock_server.reset_stats()
+    assert not Request(mock_server.url, 'test').option_codes(['routers', 'domain-name'])[0]
+    assert mock_server.stats['requests'] == 0
+
+
+def test_unknown_option_downloads_the_catalog_again(mock_server):
+    connector = Request(mock_server.url, 'test')
+    connector.option_codes(['routers'])
+    space = mock_server.store.list('dhcp/option_space')[0]['id']
+    mock_server.add('dhcp/option_code', {'code': 250, 'name': 'site-option', 'type': 'text', 'option_space': space})
+    mock_server.reset_stats()
+    (is_error, _, catalog) = connector.option_codes(['site-option'])
+    assert not is_error and catalog.get('site-option')['code'] == 250
+    assert mock_server.stats['requests'] >= 1
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from mock_server import MockServer
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request
+
+ENDPOINT = '/api/ddi/v1/ipam/ip_space'
+
+
+def listing(server, count=25):
+    '''Seeds the IP spaces and returns a connector recording the pages it asks for
+    '''
+    for i in range(count):
+        server.add('ipam/ip_space', {'name': 'sp{:02d}'.format(i)})
+    connector = Request(server.url, 'test')
+    connector.pages = []
+    send = connector._send
+
+    def record(method, endpoint, *args, **kwargs):
+        connector.pages.append(endpoint.replace(ENDPOINT, ''))
+        return send(method, endpoint, *args, **kwargs)
+    connector._send = record
+    return connector
+
+
+def names(result):
+    return sorted(obj['name'] for obj in result[2]['results'])
+
+
+def test_pages_by_offset(mock_server):
+    connector = listing(mock_server)
+    result = connector.get_all(ENDPOINT, page_size=10)
+    assert names(result) == ['sp{:02d}'.format(i) for i in range(25)]
+    assert connector.pages == ['?_limit=10&_offset=0', '?_limit=10&_offset=10', '?_limit=10&_offset=20']
+
+
+def test_pages_by_page_token():
+    with MockServer(page_tokens=True) as server:
+        connector = listing(server)
+        result = connector.get_all(ENDPOINT, page_size=10)
+    assert names(result) == ['sp{:02d}'.format(i) for i in range(25)]
+    assert connector.pages[0] == '?_limit=10&_offset=0'
+    assert all('_page_token=' in page for page in connector.pages[1:]) and len(connector.pages) == 3
+
+
+def test_max_results(mock_server):
+    connector = listing(mock_server)
+    result = connector.get_all(ENDPOINT + '?_order_by=name', page_size=10, max_results=15)
+    assert names(result) == ['sp{:02d}'.format(i) for i in range(15)]
+    assert connector.pages == ['?_order_by=name&_limit=10&_offset=0', '?_order_by=name&_limit=5&_offset=10']
+
+
+def test_failed_page_fails_the_listing(mock_server):
+    connector = listing(mock_server)
+    mock_server.inject_error(400, method='GET')
+    result = connector.get_all(ENDPOINT, page_size=10)
+    assert result[0] and result[2]['status'] == 400
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import payload_changes, same_value
+
+
+OPTIONS = [
+    {'type': 'option', 'option_code': 'dhcp/option_code/3', 'option_value': '10.0.0.1'},
+    {'type': 'option', 'option_code': 'dhcp/option_code/15', 'option_value': 'example.com'},
+]
+
+
+def test_same_value_dhcp_options_in_any_order():
+    current = [dict(o, group=None) for o in OPTIONS]
+    assert same_value(current, list(reversed(OPTIONS)), 'dhcp_options')
+    assert not same_value(current, OPTIONS[:1], 'dhcp_options')
+    assert not same_value(current, [OPTIONS[0], dict(OPTIONS[1], option_value='other.com')], 'dhcp_options')
+
+
+def test_same_value_tags_match_exactly():
+    assert same_value({'a': 'b', 'c': 'd'}, {'c': 'd', 'a': 'b'}, 'tags')
+    assert not same_value({'a': 'b', 'c': 'd'}, {'a': 'b'}, 'tags')
+    assert same_value(None, {}, 'tags')
+
+
+def test_same_value_dicts_and_scalars():
+    assert same_value({'address': '10.0.0.1', 'extra': 1}, {'address': '10.0.0.1'})
+    assert not same_value({'address': '10.0.0.1'}, {'address': '10.0.0.2'})
+    assert same_value(300, '300')
+    assert not same_value(None, '')
+
+
+def test_payload_changes():
+    current = {'name': 'a', 'comment': '', 'ttl': 300, 'tags': {'a': 'b'}, 'dhcp_options': OPTIONS}
+    assert payload_changes(current, {'name': 'a', 'ttl': '300', 'comment': None,
+                                     'dhcp_options': list(reversed(OPTIONS))}) == {}
+    assert payload_changes(current, {'comment': 'x', 'tags': {'a': 'b', 'c': 'd'}}) == \
+        {'comment': 'x', 'tags': {'a': 'b', 'c': 'd'}}
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import time
+
+import pytest
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import RateLimiter, Request
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    '''Fake clock, advanced by the sleeps it records
+    '''
+    class Clock(object):
+        now = 1000.0
+        sleeps = []
+
+        def sleep(self, seconds):
+            self.sleeps.append(round(seconds, 6))
+            self.now += seconds
+    clock = Clock()
+    monkeypatch.setattr(time, 'time', lambda: clock.now)
+    monkeypatch.setattr(time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_burst_then_rate(tmp_path, clock):
+    limiter = RateLimiter('https://example.com', rate=10, burst=2, state_dir=str(tmp_path))
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == [0.1, 0.1]
+    clock.now += 10
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == [0.1, 0.1, 0.1]
+
+
+def test_waiting_forks_are_served_in_turn(tmp_path, clock, monkeypatch):
+    # The limiters of two forks share the bucket file, and both wait at once
+    limiters = [RateLimiter('https://example.com', rate=10, burst=1, state_dir=str(tmp_path)) for _ in range(2)]
+    limiters[0].acquire()
+    monkeypatch.setattr(time, 'sleep', lambda seconds: clock.sleeps.append(round(seconds, 6)))
+    limiters[0].acquire()
+    limiters[1].acquire()
+    assert clock.sleeps == [0.1, 0.2]
+
+
+def test_no_limit(tmp_path, clock):
+    limiter = RateLimiter('https://example.com', rate=0, state_dir=str(tmp_path))
+    for _ in range(100):
+        limiter.acquire()
+    assert clock.sleeps == [] and not list(tmp_path.iterdir())
+
+
+def test_requests_are_limited(mock_server, monkeypatch):
+    monkeypatch.setenv('B1DDI_RATE_LIMIT', '20')
+    monkeypatch.setenv('B1DDI_RATE_BURST', '1')
+    connector = Request(mock_server.url, 'test')
+    start = time.time()
+    for _ in range(5):
+        assert not connector.get('/api/ddi/v1/ipam/ip_space')[0]
+    assert time.time() - start >= 0.19
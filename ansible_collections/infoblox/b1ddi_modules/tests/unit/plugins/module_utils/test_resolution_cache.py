@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import time
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request, ResolutionCache
+
+
+def test_resolution_cache(tmp_path, monkeypatch):
+    cache = ResolutionCache('https://example.com', 'account', cache_dir=str(tmp_path), ttl=60)
+    cache.set('ipam/ip_space', 'name', 'sp1', 'ipam/ip_space/1')
+    cache.set('ipam/ip_space', 'name', 'sp2', 'ipam/ip_space/2')
+    other = ResolutionCache('https://example.com', 'account', cache_dir=str(tmp_path), ttl=60)
+    assert other.get('ipam/ip_space', 'name', 'sp1') == 'ipam/ip_space/1'
+    other.invalidate(ref='ipam/ip_space/1')
+    cache.invalidate('ipam/ip_space', 'name', 'sp2')
+    assert (cache.get('ipam/ip_space', 'name', 'sp1'), other.get('ipam/ip_space', 'name', 'sp2')) == (None, None)
+    cache.set('ipam/ip_space', 'name', 'sp3', 'ipam/ip_space/3')
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert cache.get('ipam/ip_space', 'name', 'sp3') is None
+
+
+def test_disabled_resolution_cache(tmp_path):
+    cache = ResolutionCache('https://example.com', 'account', cache_dir=str(tmp_path), ttl=0)
+    cache.set('ipam/ip_space', 'name', 'sp1', 'ipam/ip_space/1')
+    assert cache.get('ipam/ip_space', 'name', 'sp1') is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_resolutions_are_shared_across_tasks(mock_server):
+    space = mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    assert Request(mock_server.url, 'test').resolve('ipam/ip_space', 'sp1') == space['id']
+    mock_server.reset_stats()
+    assert Request(mock_server.url, 'test').resolve('ipam/ip_space', 'sp1') == space['id']
+    assert Request(mock_server.url, 'test').resolve('ipam/ip_space', 'sp2') is None
+    assert mock_server.stats['calls'] == {'GET /api/ddi/v1/ipam/ip_space': 1}
+
+
+def test_stale_id_is_resolved_again(mock_server):
+    space = mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    Request(mock_server.url, 'test').resolve('ipam/ip_space', 'sp1')
+    # Recreated elsewhere since, under a new ID
+    mock_server.store.delete(space['id'])
+    space = mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    connector = Request(mock_server.url, 'test')
+    stale = connector.resolve('ipam/ip_space', 'sp1')
+    (is_error, _, result) = connector.get('/api/ddi/v1/{}'.format(stale))
+    assert (is_error, result['result']['id']) == (False, space['id'])
+    assert Request(mock_server.url, 'test').resolve('ipam/ip_space', 'sp1') == space['id']
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request, ResponseCache
+
+
+class Response(object):
+    def __init__(self, content, etag='"1"'):
+        self.content = content
+        self.headers = {'ETag': etag}
+
+
+def test_unchanged_response_is_revalidated(mock_server):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    connector = Request(mock_server.url, 'test')
+    first = connector.get('/api/ddi/v1/ipam/ip_space')
+    mock_server.reset_stats()
+    assert connector.get('/api/ddi/v1/ipam/ip_space') == first
+    assert (mock_server.stats['requests'], mock_server.stats['bytes_out']) == (1, 0)
+
+
+def test_changed_response_is_fetched_again(mock_server):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    connector = Request(mock_server.url, 'test')
+    connector.get('/api/ddi/v1/ipam/ip_space')
+    mock_server.add('ipam/ip_space', {'name': 'sp2'})
+    (_, _, result) = connector.get('/api/ddi/v1/ipam/ip_space')
+    assert sorted(space['name'] for space in result['results']) == ['sp1', 'sp2']
+
+
+def test_pages_bypass_the_cache(mock_server):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    connector = Request(mock_server.url, 'test')
+    assert connector.get_all('/api/ddi/v1/ipam/ip_space')[2]['results'][0]['name'] == 'sp1'
+    assert not os.path.isdir(connector.response_cache.path) or not os.listdir(connector.response_cache.path)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache('https://example.com', 'account', cache_dir=str(tmp_path), max_entries=2, max_bytes=1024)
+    for (i, endpoint) in enumerate(['/a', '/b', '/c']):
+        cache.set(endpoint, Response(b'{}'))
+        os.utime(cache._file(endpoint), (i, i))
+        cache.touch('/a')
+    cache.set('/d', Response(b'{}'))
+    assert [cache.get(endpoint) is not None for endpoint in ['/a', '/b', '/c', '/d']] == [True, False, False, True]
+    cache.set('/big', Response(b'x' * 2048))
+    assert cache.get('/big') is None
+
+
+def test_directory_is_scanned_only_beyond_the_bounds(tmp_path, monkeypatch):
+    cache = ResponseCache('https://example.com', 'account', cache_dir=str(tmp_path), max_entries=10, max_bytes=1024)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, '_evict', lambda: scans.append(1) or evict())
+    for i in range(10):
+        cache.set('/{}'.format(i), Response(b'{}'))
+    assert len(scans) == 1
+    cache.set('/10', Response(b'{}'))
+    assert len(scans) == 2 and len(os.listdir(cache.path)) == 10
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import email.utils
+import time
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request, RetryPolicy
+
+
+class Response(object):
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+def test_retry_after_seconds():
+    policy = RetryPolicy(backoff=0.5, max_backoff=30)
+    assert policy.delay(0, Response({'Retry-After': '7'})) == 7.0
+    assert policy.delay(0, Response({'Retry-After': '-3'})) == 0.0
+
+
+def test_retry_after_http_date():
+    policy = RetryPolicy(backoff=0.5, max_backoff=30)
+    later = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= policy.delay(0, Response({'Retry-After': later})) <= 60
+    earlier = email.utils.formatdate(time.time() - 60, usegmt=True)
+    assert policy.delay(0, Response({'Retry-After': earlier})) == 0.0
+
+
+def test_retry_backoff_without_retry_after():
+    policy = RetryPolicy(backoff=0.5, max_backoff=3)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt, Response()) <= min(3, 0.5 * 2 ** attempt)
+    assert 0 <= policy.delay(0, Response({'Retry-After': 'soon'})) <= 0.5
+
+
+def test_allows():
+    policy = RetryPolicy(retry_post=False)
+    assert policy.allows('GET') and policy.allows('PATCH') and policy.allows('DELETE')
+    assert not policy.allows('POST')
+    assert policy.allows('POST', retry=True)
+    assert not policy.allows('GET', retry=False)
+    assert RetryPolicy(retry_post=True).allows('POST')
+
+
+def test_request_retries_throttled_and_failed_calls(mock_server, monkeypatch):
+    monkeypatch.setenv('B1DDI_RETRY_BACKOFF', '0.01')
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    mock_server.inject_error(429, count=1, retry_after=0)
+    mock_server.inject_error(503, count=1)
+    result = Request(mock_server.url, 'test').get('/api/ddi/v1/ipam/ip_space')
+    assert not result[0]
+    assert [o['name'] for o in result[2]['results']] == ['sp1']
+    assert mock_server.stats['errors_injected'] == 2
+
+
+def test_request_gives_up_after_the_retries(mock_server, monkeypatch):
+    monkeypatch.setenv('B1DDI_RETRIES', '2')
+    monkeypatch.setenv('B1DDI_RETRY_BACKOFF', '0.01')
+    mock_server.inject_error(503, count=5)
+    result = Request(mock_server.url, 'test').get('/api/ddi/v1/ipam/ip_space')
+    assert result[0]
+    assert (result[2]['status'], result[2]['attempts']) == (503, 3)
+
+
+def test_post_is_not_retried_by_default(mock_server, monkeypatch):
+    monkeypatch.setenv('B1DDI_RETRY_BACKOFF', '0.01')
+    mock_server.inject_error(503, count=1, method='POST')
+    result = Request(mock_server.url, 'test').create('/api/ddi/v1/ipam/ip_space', {'name': 'sp1'})
+    assert result[0] and result[2]['status'] == 503
+    assert mock_server.store.list('ipam/ip_space') == []
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.modules.b1_dns_record_bulk import reconcile_records
+
+
+def params(server, *records, **kwargs):
+    return dict({'host': server.url, 'api_key': 'test', 'workers': None, 'state': 'present', 'purge': False,
+                 'records': list(records)}, **kwargs)
+
+
+@pytest.fixture
+def zone(mock_server):
+    return mock_server.add('dns/auth_zone', {'fqdn': 'example.com.'})['id']
+
+
+def a_records(server):
+    return sorted((r['name_in_zone'], r['rdata']['address'], r.get('ttl')) for r in server.store.list('dns/record'))
+
+
+def test_creates_updates_and_deletes(mock_server, zone):
+    mock_server.add('dns/record', {'zone': zone, 'name_in_zone': 'www', 'type': 'A', 'rdata': {'address': '10.0.0.1'}})
+    mock_server.add('dns/record', {'zone': zone, 'name_in_zone': 'old', 'type': 'A', 'rdata': {'address': '10.0.0.9'}})
+    data = params(mock_server,
+                  {'zone': 'example.com.', 'name': 'www', 'type': 'A', 'address': '10.0.0.1', 'ttl': 300},
+                  {'zone': 'example.com.', 'name': 'web', 'type': 'A', 'address': '10.0.0.2'},
+                  {'zone': 'example.com.', 'name': 'old', 'type': 'A', 'state': 'absent'})
+    (is_error, changed, result) = reconcile_records(data)
+    assert (is_error, changed) == (False, True)
+    assert [r['action'] for r in result['results']] == ['updated', 'created', 'deleted']
+    assert a_records(mock_server) == [('web', '10.0.0.2', None), ('www', '10.0.0.1', 300)]
+    (is_error, changed, result) = reconcile_records(params(mock_server, *data['records']))
+    assert (is_error, changed, result['unchanged']) == (False, False, 3)
+
+
+def test_duplicates_are_created_once(mock_server, zone):
+    record = {'zone': 'example.com.', 'name': 'www', 'type': 'A', 'address': '10.0.0.1'}
+    (is_error, changed, result) = reconcile_records(params(mock_server, record, dict(record, ttl=60)))
+    assert (is_error, changed, result['created']) == (False, True, 1)
+    assert result['results'][1] == dict(result['results'][1], action='duplicate', duplicate_of=0)
+    assert a_records(mock_server) == [('www', '10.0.0.1', 60)]
+
+
+def test_failed_record_does_not_stop_the_others(mock_server, zone):
+    mock_server.add('dns/record', {'zone': zone, 'name_in_zone': 'www', 'type': 'A', 'rdata': {'address': '10.0.0.1'}})
+    mock_server.inject_error(400, method='POST')
+    data = params(mock_server,
+                  {'zone': 'example.com.', 'name': 'web', 'type': 'A', 'address': '10.0.0.2'},
+                  {'zone': 'example.com.', 'name': 'www', 'type': 'A', 'address': '10.0.0.1', 'ttl': 300})
+    (is_error, changed, result) = reconcile_records(data)
+    assert (is_error, changed, result['failed'], result['updated']) == (True, True, 1, 1)
+    assert result['results'][0]['action'] == 'failed' and result['results'][0]['response']
+    assert a_records(mock_server) == [('www', '10.0.0.1', 300)]
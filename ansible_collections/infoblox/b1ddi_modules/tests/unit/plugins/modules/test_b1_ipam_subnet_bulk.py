@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.infoblox.b1ddi_modules.plugins.modules.b1_ipam_subnet_bulk import reconcile_subnets
+
+
+def params(server, *subnets):
+    return {'host': server.url, 'api_key': 'test', 'workers': None, 'state': 'present', 'subnets': list(subnets)}
+
+
+@pytest.mark.parametrize('options', [[], [{}], [{}, {}]])
+def test_options_without_keys_mean_no_options(mock_server, options):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    data = params(mock_server, {'space': 'sp1', 'address': '10.0.2.0/24', 'dhcp_options': options})
+    (is_error, changed, result) = reconcile_subnets(dict(data))
+    assert (is_error, changed, result['created']) == (False, True, 1)
+    (subnet,) = mock_server.store.list('ipam/subnet')
+    assert subnet['dhcp_options'] == []
+    assert reconcile_subnets(dict(data))[:2] == (False, False)
+
+
+
+
+
+def test_reordered_options_are_unchanged(mock_server):
+    mock_server.add('ipam/ip_space', {'name': 'sp1'})
+    options = [{'routers': '10.0.2.1'}, {'domain-name': 'example.com'}]
+    data = params(mock_server, {'space': 'sp1', 'address': '10.0.2.0/24', 'dhcp_options': options})
+    assert reconcile_subnets(dict(data))[:2] == (False, True)
+    data['subnets'][0]['dhcp_options'] = list(reversed(options))
+    mock_server.reset_stats()
+    assert reconcile_subnets(dict(data))[:2] == (False, False)
+    assert not [call for call in mock_server.stats['calls'] if not call.startswith('GET')]
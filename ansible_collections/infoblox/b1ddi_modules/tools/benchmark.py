@@ -0,0 +1,307 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''Benchmark of the b1_* module entry points against the mock BloxOne API.
+
+Every operation (create, update, get, gather, next available, absent) of every
+module runs in a forked process against tools/mock_server.py with the given
+per-request latency. The wall time, the HTTP calls and body bytes seen by the
+server and the peak RSS of the process are written as JSON, which --compare
+diffs against the results of another version::
+
+    python tools/benchmark.py --latency 0.02 --output before.json
+    python tools/benchmark.py --latency 0.02 --output after.json --compare before.json
+'''
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+COLLECTION_DIR = os.path.dirname(TOOLS_DIR)
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.abspath(os.path.join(COLLECTION_DIR, '..', '..', '..')))
+
+from mock_server import MockServer
+
+MODULES = 'ansible_collections.infoblox.b1ddi_modules.plugins.modules.'
+
+TAGS = [{'Owner': 'benchmark'}]
+GATHER = {'fields': None, 'filters': {}, 'tfilters': {}, 'page_size': 1000, 'max_results': None, 'order_by': None,
+          'output_file': None}
+
+# (operation, module, entry point, arguments), in the order they run. Every
+# object is created, updated by a second present call, read back and gathered,
+# and the objects are deleted in reverse order at the end.
+SCENARIOS = [
+    ('create', 'b1_ipam_ip_space', 'create_ip_space', {'name': 'bench-space', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ipam_ip_space', 'create_ip_space', {'name': 'bench-space', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ipam_ip_space', 'get_ip_space', {'name': 'bench-space'}),
+    ('gather', 'b1_ipam_ip_space_gather', 'get_ip_space', GATHER),
+    ('create', 'b1_ipam_address_block', 'create_address_block',
+     {'address': '10.0.0.0/16', 'space': 'bench-space', 'name': 'bench-block', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ipam_address_block', 'create_address_block',
+     {'address': '10.0.0.0/16', 'space': 'bench-space', 'name': 'bench-block', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ipam_address_block', 'get_address_block', {'address': '10.0.0.0/16', 'space': 'bench-space'}),
+    ('gather', 'b1_ipam_address_block_gather', 'get_address_block', GATHER),
+    ('create', 'b1_ipam_subnet', 'create_subnet',
+     {'address': '10.0.1.0/24', 'space': 'bench-space', 'name': 'bench-subnet', 'comment': 'a', 'tags': TAGS,
+      'dhcp_host': 'bench-dhcp', 'dhcp_options': [{'routers': 'first'}, {'domain-name-servers': '10.0.0.53'}]}),
+    ('update', 'b1_ipam_subnet', 'create_subnet',
+     {'address': '10.0.1.0/24', 'space': 'bench-space', 'name': 'bench-subnet', 'comment': 'b', 'tags': TAGS,
+      'dhcp_host': 'bench-dhcp', 'dhcp_options': [{'routers': 'first'}]}),
+    ('get', 'b1_ipam_subnet', 'get_subnet', {'address': '10.0.1.0/24', 'space': 'bench-space'}),
+    ('next_available', 'b1_ipam_subnet', 'create_subnet',
+     {'address': "{'next_available_subnet': {'parent_block': '10.0.0.0/16', 'cidr': 24, 'count': 4}}",
+      'space': 'bench-space', 'name': 'bench-next', 'comment': 'a', 'tags': TAGS}),
+    ('gather', 'b1_ipam_subnet_gather', 'get_subnet', GATHER),
+    ('create', 'b1_ipam_range', 'create_range',
+     {'start': '10.0.1.100', 'end': '10.0.1.150', 'space': 'bench-space', 'name': 'bench-range', 'comment': 'a',
+      'tags': TAGS, 'dhcp_host': 'bench-dhcp'}),
+    ('update', 'b1_ipam_range', 'create_range',
+     {'start': '10.0.1.100', 'end': '10.0.1.150', 'space': 'bench-space', 'name': 'bench-range', 'comment': 'b',
+      'tags': TAGS, 'dhcp_host': 'bench-dhcp'}),
+    ('get', 'b1_ipam_range', 'get_range', {'start': '10.0.1.100', 'end': '10.0.1.150', 'space': 'bench-space'}),
+    ('create', 'b1_ipam_fixed_address', 'create_fixed_address',
+     {'address': '10.0.1.10', 'space': 'bench-space', 'name': 'bench-fixed', 'match_type': 'mac',
+      'match_value': 'aa:bb:cc:dd:ee:ff', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ipam_fixed_address', 'create_fixed_address',
+     {'address': '10.0.1.10', 'space': 'bench-space', 'name': 'bench-fixed', 'match_type': 'mac',
+      'match_value': 'aa:bb:cc:dd:ee:ff', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ipam_fixed_address', 'get_fixed_address', {'address': '10.0.1.10', 'space': 'bench-space'}),
+    ('next_available', 'b1_ipam_fixed_address', 'create_fixed_address',
+     {'address': "{'next_available_ip': {'subnet': '10.0.1.0/24'}}", 'space': 'bench-space', 'name': 'bench-next',
+      'match_type': 'mac', 'match_value': 'aa:bb:cc:dd:ee:00', 'comment': 'a', 'tags': TAGS}),
+    ('gather', 'b1_ipam_fixed_address_gather', 'get_fixed_address', GATHER),
+    ('create', 'b1_ipam_ipv4_reservation', 'create_ipv4_reservation',
+     {'address': '10.0.1.20', 'space': 'bench-space', 'name': 'bench-reservation', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ipam_ipv4_reservation', 'create_ipv4_reservation',
+     {'address': '10.0.1.20', 'space': 'bench-space', 'name': 'bench-reservation', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ipam_ipv4_reservation', 'get_ipv4_reservation', {'address': '10.0.1.20', 'space': 'bench-space'}),
+    ('gather', 'b1_ipam_ipv4_reservation_gather', 'get_ipv4_reservation', GATHER),
+    ('create', 'b1_ipam_host', 'create_host',
+     {'name': 'bench-host', 'addresses': [{'bench-space': '10.0.1.30'}], 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ipam_host', 'create_host',
+     {'name': 'bench-host', 'addresses': [{'bench-space': '10.0.1.30'}], 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ipam_host', 'get_host', {'name': 'bench-host'}),
+    ('gather', 'b1_ipam_host_gather', 'get_host', GATHER),
+    ('create', 'b1_dhcp_option_space', 'create_option_space',
+     {'name': 'bench-options', 'protocol': 'ip4', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_dhcp_option_space', 'create_option_space',
+     {'name': 'bench-options', 'protocol': 'ip4', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_dhcp_option_space', 'get_option_space', {'name': 'bench-options'}),
+    ('gather', 'b1_dhcp_option_space_gather', 'get_option_space', GATHER),
+    ('create', 'b1_dns_view', 'create_dns_view', {'name': 'bench-view', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_dns_view', 'create_dns_view', {'name': 'bench-view', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_dns_view', 'get_dns_view', {'name': 'bench-view'}),
+    ('gather', 'b1_dns_view_gather', 'get_dns_view_gather', GATHER),
+    ('create', 'b1_dns_auth_zone', 'create_auth_zone',
+     {'fqdn': 'bench.example.com.', 'view': 'bench-view', 'primary_type': 'cloud', 'comment': 'a', 'tags': TAGS,
+      'internal_secondaries': ['bench-ns'], 'external_primaries': []}),
+    ('update', 'b1_dns_auth_zone', 'create_auth_zone',
+     {'fqdn': 'bench.example.com.', 'view': 'bench-view', 'primary_type': 'cloud', 'comment': 'b', 'tags': TAGS,
+      'internal_secondaries': ['bench-ns'], 'external_primaries': []}),
+    ('get', 'b1_dns_auth_zone', 'get_auth_zone', {'fqdn': 'bench.example.com.', 'view': 'bench-view'}),
+    ('gather', 'b1_dns_zone_gather', 'get_dns_zone_gather', GATHER),
+    ('create', 'b1_a_record', 'create_a_record',
+     {'zone': 'bench.example.com.', 'name': 'www', 'address': '10.0.1.40', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_a_record', 'create_a_record',
+     {'zone': 'bench.example.com.', 'name': 'www', 'address': '10.0.1.40', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_a_record', 'get_a_record', {'zone': 'bench.example.com.', 'name': 'www'}),
+    ('gather', 'b1_a_record_gather', 'get_a_record_gather', dict(GATHER, filters={'type': 'A'})),
+    ('create', 'b1_cname_record', 'create_cname_record',
+     {'zone': 'bench.example.com.', 'name': 'alias', 'can_name': 'www.bench.example.com.', 'comment': 'a',
+      'tags': TAGS}),
+    ('update', 'b1_cname_record', 'create_cname_record',
+     {'zone': 'bench.example.com.', 'name': 'alias', 'can_name': 'www.bench.example.com.', 'comment': 'b',
+      'tags': TAGS}),
+    ('get', 'b1_cname_record', 'get_cname_record', {'zone': 'bench.example.com.', 'name': 'alias'}),
+    ('gather', 'b1_cname_record_gather', 'get_cname_record_gather', dict(GATHER, filters={'type': 'CNAME'})),
+    ('create', 'b1_ns_record', 'create_ns_record',
+     {'zone': 'bench.example.com.', 'name': 'sub', 'ns_server': 'ns1.example.com.', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ns_record', 'create_ns_record',
+     {'zone': 'bench.example.com.', 'name': 'sub', 'ns_server': 'ns1.example.com.', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ns_record', 'get_ns_record', {'zone': 'bench.example.com.', 'name': 'sub'}),
+    ('gather', 'b1_ns_record_gather', 'get_ns_record_gather', dict(GATHER, filters={'type': 'NS'})),
+    ('create', 'b1_ptr_record', 'create_ptr_record',
+     {'zone': 'bench.example.com.', 'name': '40', 'address': '10.0.1.40', 'comment': 'a', 'tags': TAGS}),
+    ('update', 'b1_ptr_record', 'create_ptr_record',
+     {'zone': 'bench.example.com.', 'name': '40', 'address': '10.0.1.40', 'comment': 'b', 'tags': TAGS}),
+    ('get', 'b1_ptr_record', 'get_ptr_record', {'zone': 'bench.example.com.', 'name': '40'}),
+    ('gather', 'b1_ptr_record_gather', 'get_ptr_record_gather', dict(GATHER, filters={'type': 'PTR'})),
+]
+
+ABSENT = [
+    ('b1_ptr_record', 'delete_ptr_record'),
+    ('b1_ns_record', 'delete_ns_record'),
+    ('b1_cname_record', 'delete_cname_record'),
+    ('b1_a_record', 'delete_a_record'),
+    ('b1_dns_auth_zone', 'delete_auth_zone'),
+    ('b1_dns_view', 'delete_dns_view'),
+    ('b1_dhcp_option_space', 'delete_option_space'),
+    ('b1_ipam_host', 'delete_host'),
+    ('b1_ipam_ipv4_reservation', 'delete_ipv4_reservation'),
+    ('b1_ipam_fixed_address', 'delete_fixed_address'),
+    ('b1_ipam_range', 'delete_range'),
+    ('b1_ipam_subnet', 'delete_subnet'),
+    ('b1_ipam_address_block', 'delete_address_block'),
+    ('b1_ipam_ip_space', 'delete_ip_space'),
+]
+
+
+class _ArgumentSpec(Exception):
+    pass
+
+
+def argument_defaults(module):
+    '''Returns the module parameters with their defaults, read from the
+    argument spec main() hands to AnsibleModule
+    '''
+    def capture(argument_spec, **kwargs):
+        raise _ArgumentSpec(argument_spec)
+    original = module.AnsibleModule
+    module.AnsibleModule = capture
+    try:
+        module.main()
+    except _ArgumentSpec as e:
+        return dict((k, v.get('default')) for k, v in e.args[0].items())
+    finally:
+        module.AnsibleModule = original
+    return {}
+
+
+def absent_scenarios():
+    '''Deletes the objects created by the scenarios, with the arguments of
+    their create call
+    '''
+    scenarios = []
+    for (module, function) in ABSENT:
+        args = [s[3] for s in SCENARIOS if s[0] == 'create' and s[1] == module][0]
+        scenarios.append(('absent', module, function, args))
+    return scenarios
+
+
+def _run(module_name, function, params, conn):
+    '''Runs one entry point in the forked process and reports its outcome
+    '''
+    try:
+        module = importlib.import_module(MODULES + module_name)
+        # What Request.bind() does for a module run
+        from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request
+        Request.begin()
+        start = time.time()
+        (is_error, has_changed, result) = getattr(module, function)(params)
+        wall = time.time() - start
+        error = result if is_error else None
+    except Exception as e:
+        (wall, error) = (None, repr(e))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send({'wall_time': wall, 'error': error, 'peak_rss_kb': peak})
+    conn.close()
+
+
+def run(latency, jitter):
+    '''Runs every scenario against a fresh mock server and returns the results
+    '''
+    ctx = multiprocessing.get_context('fork')
+    results = []
+    with MockServer(latency=latency, jitter=jitter) as server:
+        server.add('dhcp/host', {'name': 'bench-dhcp'})
+        server.add('dns/host', {'name': 'bench-ns'})
+        defaults = {}
+        for (operation, module_name, function, args) in SCENARIOS + absent_scenarios():
+            if module_name not in defaults:
+                defaults[module_name] = argument_defaults(importlib.import_module(MODULES + module_name))
+            params = dict(defaults[module_name], host=server.url, api_key='benchmark', **args)
+            server.reset_stats()
+            (parent, child) = ctx.Pipe()
+            process = ctx.Process(target=_run, args=(module_name, function, params, child))
+            process.start()
+            outcome = parent.recv()
+            process.join()
+            stats = server.stats
+            results.append({
+                'module': module_name,
+                'operation': operation,
+                'function': function,
+                'ok': outcome['error'] is None,
+                'error': outcome['error'],
+                'wall_time': outcome['wall_time'],
+                'http_calls': stats['requests'],
+                'bytes_sent': stats['bytes_in'],
+                'bytes_received': stats['bytes_out'],
+                'peak_rss_kb': outcome['peak_rss_kb'],
+                'calls': stats['calls'],
+            })
+    return results
+
+
+def compare(results, baseline):
+    '''Prints the difference in HTTP calls and wall time with a previous run
+    '''
+    before = dict(((r['module'], r['operation']), r) for r in baseline['results'])
+    print('{:<34} {:<15} {:>12} {:>20}'.format('module', 'operation', 'calls', 'wall time (ms)'))
+    for r in results:
+        b = before.get((r['module'], r['operation']))
+        if b is None:
+            continue
+        wall = lambda x: '-' if x['wall_time'] is None else '{:.1f}'.format(x['wall_time'] * 1000)
+        print('{:<34} {:<15} {:>5} -> {:<4} {:>8} -> {:<8}'.format(
+            r['module'], r['operation'], b['http_calls'], r['http_calls'], wall(b), wall(r)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the b1_* modules against the mock BloxOne API')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every API response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra seconds, up to this value')
+    parser.add_argument('--output', default='benchmark.json', help='JSON file the results are written to')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare with')
+    args = parser.parse_args()
+
+    # Each run starts from a cold name to ID resolution cache
+    cache_dir = tempfile.mkdtemp(prefix='b1ddi-bench-')
+    os.environ['B1DDI_CACHE_DIR'] = cache_dir
+    try:
+        results = run(args.latency, args.jitter)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'python': sys.version.split()[0],
+        'totals': {
+            'wall_time': sum(r['wall_time'] or 0 for r in results),
+            'http_calls': sum(r['http_calls'] for r in results),
+            'bytes_sent': sum(r['bytes_sent'] for r in results),
+            'bytes_received': sum(r['bytes_received'] for r in results),
+            'failed': sum(1 for r in results if not r['ok']),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    for r in results:
+        print('{:<34} {:<15} {:>3} calls {:>8.1f} ms {}'.format(
+            r['module'], r['operation'], r['http_calls'], (r['wall_time'] or 0) * 1000, '' if r['ok'] else 'FAILED'))
+    print('total: {http_calls} calls, {wall_time:.2f} s, {failed} failed'.format(**report['totals']))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
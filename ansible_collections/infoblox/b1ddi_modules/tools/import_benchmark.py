@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''Import time benchmark of the b1_* modules.
+
+Every module is imported in a fresh interpreter with ``python -X importtime``,
+the way AnsiballZ starts it, and the cumulative import time of the module and
+of its heaviest dependencies is taken as the median of the given number of
+runs. The results are written as JSON, which --compare diffs against the
+results of another version::
+
+    python tools/import_benchmark.py --output before.json
+    python tools/import_benchmark.py --output after.json --compare before.json
+'''
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+COLLECTION_DIR = os.path.dirname(TOOLS_DIR)
+ROOT_DIR = os.path.abspath(os.path.join(COLLECTION_DIR, '..', '..', '..'))
+
+MODULES = 'ansible_collections.infoblox.b1ddi_modules.plugins.modules.'
+MODULE_UTILS = 'ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi'
+
+# Dependencies whose cumulative import time is reported on their own
+TRACKED = ('ansible.module_utils.basic', MODULE_UTILS, 'requests', 'ipaddress', 'email', 'concurrent.futures')
+
+IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_times(module):
+    '''Imports the module in a new interpreter and returns the cumulative
+    import time, in microseconds, of every package it loaded
+    '''
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                          env=env, cwd=ROOT_DIR, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                          universal_newlines=True)
+    if proc.returncode != 0:
+        raise RuntimeError('importing {} failed:\n{}'.format(module, proc.stderr[-2000:]))
+    times = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME.match(line)
+        if m:
+            times[m.group(4)] = int(m.group(2))
+    return times
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def run(repeat):
+    '''Returns the import times of every module, the median of repeat runs
+    '''
+    modules_dir = os.path.join(COLLECTION_DIR, 'plugins', 'modules')
+    names = sorted(f[:-3] for f in os.listdir(modules_dir) if f.startswith('b1_') and f.endswith('.py'))
+    results = []
+    for name in names:
+        runs = [import_times(MODULES + name) for _ in range(repeat)]
+        results.append({
+            'module': name,
+            'import_us': median([r[MODULES + name] for r in runs]),
+            'modules_loaded': median([len(r) for r in runs]),
+            'tracked_us': dict((t, median([r.get(t, 0) for r in runs])) for t in TRACKED),
+        })
+    return results
+
+
+def compare(results, baseline):
+    '''Prints the difference in import time with a previous run
+    '''
+    before = dict((r['module'], r) for r in baseline['results'])
+    print('{:<34} {:>24} {:>20}'.format('module', 'import time (ms)', 'modules loaded'))
+    for r in results:
+        b = before.get(r['module'])
+        if b is None:
+            continue
+        print('{:<34} {:>10.1f} -> {:<10.1f} {:>8} -> {:<8}'.format(
+            r['module'], b['import_us'] / 1000.0, r['import_us'] / 1000.0, b['modules_loaded'], r['modules_loaded']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the import time of the b1_* modules')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per module, the median is kept')
+    parser.add_argument('--output', default='import_benchmark.json', help='JSON file the results are written to')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare with')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'repeat': args.repeat,
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('{:<34} {:>10} {:>8}  {}'.format('module', 'ms', 'modules', 'of which (ms)'))
+    for r in results:
+        tracked = ', '.join('{} {:.1f}'.format(t.rsplit('.', 1)[-1] if t == MODULE_UTILS else t, us / 1000.0)
+                            for t, us in r['tracked_us'].items() if us)
+        print('{:<34} {:>10.1f} {:>8}  {}'.format(r['module'], r['import_us'] / 1000.0, r['modules_loaded'], tracked))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
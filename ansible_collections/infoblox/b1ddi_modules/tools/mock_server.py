@@ -0,0 +1,591 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''Stand-in for the BloxOne DDI API, to run the collection without a CSP tenant.
+
+The server keeps the objects in memory and implements the endpoints the
+modules use, with _filter, _tfilter, _fields and paging support, ETags, gzip
+compression, the nextavailable* actions, and injected latency and errors.
+
+Started in-process::
+
+    with MockServer(latency=0.02) as server:
+        Request(server.url, 'any-token').get('/api/ddi/v1/ipam/ip_space')
+
+or as a subprocess::
+
+    python tools/mock_server.py --port 8080 --latency 0.02 --error-rate 0.01
+'''
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import base64
+import copy
+import gzip
+import hashlib
+import ipaddress
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    raise ImportError("The mock server requires Python 3.7 or later")
+
+API_PREFIX = '/api/ddi/v1/'
+
+OBJECT_TYPES = (
+    'ipam/ip_space', 'ipam/address_block', 'ipam/subnet', 'ipam/range', 'ipam/address', 'ipam/host',
+    'dhcp/fixed_address', 'dhcp/host', 'dhcp/ha_group', 'dhcp/option_code', 'dhcp/option_space',
+    'dns/view', 'dns/auth_zone', 'dns/record', 'dns/host',
+)
+
+# Fields that identify an object within its type, a create with the same
+# values is rejected as a duplicate like the API does
+UNIQUE_FIELDS = {
+    'ipam/ip_space': ('name',),
+    'ipam/address_block': ('space', 'address', 'cidr'),
+    'ipam/subnet': ('space', 'address', 'cidr'),
+    'ipam/range': ('space', 'start', 'end'),
+    'ipam/address': ('space', 'address'),
+    'ipam/host': ('name',),
+    'dhcp/fixed_address': ('ip_space', 'address'),
+    'dhcp/host': ('name',),
+    'dhcp/ha_group': ('name',),
+    'dhcp/option_space': ('name',),
+    'dns/view': ('name',),
+    'dns/auth_zone': ('view', 'fqdn'),
+    'dns/host': ('name',),
+}
+
+# Standard DHCPv4 options the option_code listing is seeded with
+DHCP_OPTION_CODES = (
+    (1, 'subnet-mask', 'ip-address'), (2, 'time-offset', 'int32'), (3, 'routers', 'array of ip-address'),
+    (4, 'time-servers', 'array of ip-address'), (6, 'domain-name-servers', 'array of ip-address'),
+    (12, 'host-name', 'text'), (15, 'domain-name', 'domain'), (19, 'ip-forwarding', 'boolean'),
+    (23, 'default-ip-ttl', 'uint8'), (26, 'interface-mtu', 'uint16'), (28, 'broadcast-address', 'ip-address'),
+    (33, 'static-routes', 'array of ip-address'), (42, 'ntp-servers', 'array of ip-address'),
+    (43, 'vendor-encapsulated-options', 'binary'), (44, 'netbios-name-servers', 'array of ip-address'),
+    (46, 'netbios-node-type', 'uint8'), (51, 'dhcp-lease-time', 'uint32'), (60, 'vendor-class-identifier', 'text'),
+    (66, 'tftp-server-name', 'text'), (67, 'boot-file-name', 'text'), (119, 'domain-search', 'domain-list'),
+    (121, 'classless-static-route', 'classless-static-route'), (150, 'tftp-server-address', 'array of ip-address'),
+)
+
+
+class MockError(Exception):
+    '''Error answered to the client with the given HTTP status
+    '''
+    def __init__(self, status, message):
+        super(MockError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class FilterParser(object):
+    '''Parser of the _filter and _tfilter expressions, e.g.
+    name=="a" and (cidr>=24 or comment~'^lab') and not tag in ['x', 'y']
+    '''
+    TOKENS = re.compile(r'''\s*(?:
+        (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|
+        (?P<num>-?\d+(?:\.\d+)?(?![\w.]))|
+        (?P<op>==|!=|<=|>=|!~|~|<|>|\(|\)|\[|\]|,)|
+        (?P<word>[\w.\-]+)
+    )''', re.X)
+
+    def __init__(self, text):
+        self.tokens = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            m = self.TOKENS.match(text, pos)
+            if not m or m.end() == pos:
+                raise MockError(400, 'Invalid filter near: {}'.format(text[pos:]))
+            pos = m.end()
+            kind = m.lastgroup
+            value = m.group(kind)
+            if kind == 'str':
+                value = re.sub(r'\\(.)', r'\1', value[1:-1])
+            elif kind == 'num':
+                value = float(value) if '.' in value else int(value)
+            elif kind == 'word' and value.lower() in ('and', 'or', 'not', 'in'):
+                kind = 'op'
+                value = value.lower()
+            self.tokens.append((kind, value))
+        self.pos = 0
+
+    def parse(self):
+        '''Returns the predicate the expression stands for
+        '''
+        predicate = self._or()
+        if self.pos != len(self.tokens):
+            raise MockError(400, 'Unexpected token in filter: {}'.format(self.tokens[self.pos][1]))
+        return predicate
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, value=None):
+        token = self._peek()
+        if token[0] is None or (value is not None and token != ('op', value)):
+            raise MockError(400, 'Expected {} in filter'.format(value or 'a value'))
+        self.pos += 1
+        return token
+
+    def _or(self):
+        left = self._and()
+        while self._peek() == ('op', 'or'):
+            self._take('or')
+            right = self._and()
+            left = (lambda a, b: lambda obj: a(obj) or b(obj))(left, right)
+        return left
+
+    def _and(self):
+        left = self._not()
+        while self._peek() == ('op', 'and'):
+            self._take('and')
+            right = self._not()
+            left = (lambda a, b: lambda obj: a(obj) and b(obj))(left, right)
+        return left
+
+    def _not(self):
+        if self._peek() == ('op', 'not'):
+            self._take('not')
+            inner = self._not()
+            return lambda obj: not inner(obj)
+        if self._peek() == ('op', '('):
+            self._take('(')
+            inner = self._or()
+            self._take(')')
+            return inner
+        return self._comparison()
+
+    def _literal(self):
+        kind, value = self._take()
+        if kind == 'word':
+            return {'null': None, 'true': True, 'false': False}.get(value.lower(), value)
+        if kind == 'op':
+            raise MockError(400, 'Expected a value in filter, got {}'.format(value))
+        return value
+
+    def _comparison(self):
+        kind, field = self._take()
+        if kind != 'word':
+            raise MockError(400, 'Expected a field name in filter, got {}'.format(field))
+        kind, op = self._take()
+        if op == 'in':
+            self._take('[')
+            values = []
+            while self._peek() != ('op', ']'):
+                values.append(self._literal())
+                if self._peek() == ('op', ','):
+                    self._take(',')
+            self._take(']')
+            return lambda obj: any(compare(lookup(obj, field), '==', v) for v in values)
+        if kind != 'op' or op not in ('==', '!=', '<', '<=', '>', '>=', '~', '!~'):
+            raise MockError(400, 'Unknown filter operator: {}'.format(op))
+        value = self._literal()
+        return lambda obj: compare(lookup(obj, field), op, value)
+
+
+def lookup(obj, field):
+    '''Returns the value of a possibly dotted field of the object
+    '''
+    for part in field.split('.'):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
+
+
+def compare(actual, op, expected):
+    '''Compares a field value with a filter literal, loosely typed like the API
+    '''
+    if op in ('~', '!~'):
+        found = actual is not None and re.search(str(expected), str(actual), re.I) is not None
+        return found if op == '~' else not found
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool) and isinstance(actual, str):
+        try:
+            actual = float(actual)
+        except ValueError:
+            return op == '!='
+    elif isinstance(actual, (int, float)) and not isinstance(actual, bool) and isinstance(expected, str):
+        actual = str(actual)
+    if op == '==':
+        return actual == expected
+    if op == '!=':
+        return actual != expected
+    if actual is None or expected is None:
+        return False
+    try:
+        return {'<': actual < expected, '<=': actual <= expected,
+                '>': actual > expected, '>=': actual >= expected}[op]
+    except TypeError:
+        return False
+
+
+class Store(object):
+    '''In-memory store of the BloxOne objects, by type and ID
+    '''
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.objects = dict((t, {}) for t in OBJECT_TYPES)
+        option_space = self.create('dhcp/option_space', {'name': 'dhcp4', 'protocol': 'ip4'})
+        for (code, name, option_type) in DHCP_OPTION_CODES:
+            self.create('dhcp/option_code', {'code': code, 'name': name, 'type': option_type,
+                                             'array': option_type.startswith('array'),
+                                             'option_space': option_space['id'], 'source': 'system'})
+
+    def normalize(self, obj_type, obj):
+        '''Splits CIDR notations the way the API stores them
+        '''
+        if obj_type in ('ipam/address_block', 'ipam/subnet') and '/' in str(obj.get('address', '')):
+            (address, cidr) = obj['address'].split('/', 1)
+            obj['address'] = address
+            obj['cidr'] = int(cidr)
+        return obj
+
+    def create(self, obj_type, payload):
+        '''Adds an object, rejecting duplicates of its unique fields
+        '''
+        with self.lock:
+            obj = self.normalize(obj_type, copy.deepcopy(payload or {}))
+            unique = UNIQUE_FIELDS.get(obj_type)
+            if unique and all(obj.get(f) is not None for f in unique):
+                for other in self.objects[obj_type].values():
+                    if all(other.get(f) == obj.get(f) for f in unique):
+                        raise MockError(409, '{} already exists'.format(obj_type))
+            now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            obj['id'] = '{}/{}'.format(obj_type, uuid.uuid4())
+            obj.setdefault('comment', '')
+            obj.setdefault('tags', {})
+            obj['created_at'] = obj['updated_at'] = now
+            self.objects[obj_type][obj['id']] = obj
+            return obj
+
+    def get(self, obj_id):
+        obj_type = obj_id.rsplit('/', 1)[0]
+        obj = self.objects.get(obj_type, {}).get(obj_id)
+        if obj is None:
+            raise MockError(404, '{} not found'.format(obj_id))
+        return obj
+
+    def update(self, obj_id, payload, replace=False):
+        with self.lock:
+            obj = self.get(obj_id)
+            fields = self.normalize(obj_id.rsplit('/', 1)[0], copy.deepcopy(payload or {}))
+            if replace:
+                for k in [k for k in obj if k not in ('id', 'created_at')]:
+                    del obj[k]
+            fields.pop('id', None)
+            obj.update(fields)
+            obj['updated_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            return obj
+
+    def delete(self, obj_id):
+        with self.lock:
+            self.get(obj_id)
+            del self.objects[obj_id.rsplit('/', 1)[0]][obj_id]
+
+    def list(self, obj_type, predicate=None, tpredicate=None):
+        with self.lock:
+            objects = list(self.objects[obj_type].values())
+        if predicate is not None:
+            objects = [o for o in objects if predicate(o)]
+        if tpredicate is not None:
+            objects = [o for o in objects if tpredicate(o.get('tags') or {})]
+        return objects
+
+    def networks(self, obj_type, space):
+        '''Returns the networks of the given type configured in the IP space
+        '''
+        return [ipaddress.ip_network('{}/{}'.format(o['address'], o['cidr']), strict=False)
+                for o in self.list(obj_type) if o.get('space') == space and 'cidr' in o]
+
+    def used_addresses(self, space):
+        used = set()
+        for obj_type, field in (('ipam/address', 'space'), ('dhcp/fixed_address', 'ip_space')):
+            used.update(o['address'] for o in self.list(obj_type) if o.get(field) == space and o.get('address'))
+        for host in self.list('ipam/host'):
+            used.update(a.get('address') for a in host.get('addresses') or [] if a.get('space') == space)
+        return used
+
+
+class MockServer(object):
+    '''Mock BloxOne DDI API server running in a background thread
+    '''
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_statuses=(503,), retry_after=None, api_key=None, page_tokens=False, compress=True):
+        '''Initialize the server address, the injected latency and errors and
+        the API token checked on every call (any token when not set). Responses
+        of 1 KB and more are gzip compressed for clients accepting it, unless
+        compress is false.
+        '''
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.api_key = api_key
+        self.page_tokens = page_tokens
+        self.compress = compress
+        self.store = Store()
+        self.injected = []
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}'.format(*self.httpd.server_address[:2])
+
+    def start(self):
+        '''Serves the API from a background thread and returns its base URL
+        '''
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def add(self, obj_type, obj):
+        '''Seeds an object, e.g. the on-prem DNS and DHCP hosts the API does not create
+        '''
+        return self.store.create(obj_type, obj)
+
+    def inject_error(self, status, count=1, method=None, path=None, retry_after=None):
+        '''Answers the next count requests matching the method and the path
+        regex with the given status
+        '''
+        with self.stats_lock:
+            self.injected.append({'status': status, 'count': count, 'method': method,
+                                  'path': re.compile(path) if path else None, 'retry_after': retry_after})
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {'requests': 0, 'bytes_in': 0, 'bytes_out': 0, 'errors_injected': 0, 'calls': {}}
+
+    def record(self, method, path, bytes_in, bytes_out):
+        key = '{} {}'.format(method, re.sub(r'/[0-9a-f-]{36}', '/{id}', path))
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_in'] += bytes_in
+            self.stats['bytes_out'] += bytes_out
+            self.stats['calls'][key] = self.stats['calls'].get(key, 0) + 1
+
+    def injected_error(self, method, path):
+        '''Returns the (status, retry_after) to answer instead of the request, if any
+        '''
+        with self.stats_lock:
+            for rule in self.injected:
+                if (rule['method'] in (None, method) and (rule['path'] is None or rule['path'].search(path))):
+                    rule['count'] -= 1
+                    if rule['count'] <= 0:
+                        self.injected.remove(rule)
+                    self.stats['errors_injected'] += 1
+                    return (rule['status'], rule['retry_after'])
+            if self.error_rate and random.random() < self.error_rate:
+                self.stats['errors_injected'] += 1
+                return (random.choice(self.error_statuses), self.retry_after)
+        return None
+
+    def dispatch(self, method, path, query, payload):
+        '''Routes an API call and returns the (status, body) of the answer
+        '''
+        if not path.startswith(API_PREFIX):
+            raise MockError(404, 'Unknown endpoint {}'.format(path))
+        path = path[len(API_PREFIX):].strip('/')
+        store = self.store
+        if path in OBJECT_TYPES:
+            if method == 'GET':
+                return (200, self.listing(path, query))
+            if method == 'POST':
+                return (201, {'result': store.create(path, payload)})
+            raise MockError(405, 'Method not allowed')
+        (base, _, action) = path.rpartition('/')
+        if action.startswith('nextavailable') and base.rsplit('/', 1)[0] in OBJECT_TYPES:
+            return (200 if method == 'GET' else 201, self.next_available(method, base, action, query))
+        if path.rsplit('/', 1)[0] not in OBJECT_TYPES:
+            raise MockError(404, 'Unknown endpoint {}'.format(path))
+        if method == 'GET':
+            return (200, {'result': fields(store.get(path), query)})
+        if method in ('PATCH', 'PUT'):
+            return (200, {'result': store.update(path, payload, replace=(method == 'PUT'))})
+        if method == 'DELETE':
+            store.delete(path)
+            return (200, {})
+        raise MockError(405, 'Method not allowed')
+
+    def listing(self, obj_type, query):
+        predicate = FilterParser(query['_filter']).parse() if query.get('_filter') else None
+        tpredicate = FilterParser(query['_tfilter']).parse() if query.get('_tfilter') else None
+        objects = self.store.list(obj_type, predicate, tpredicate)
+        if query.get('_order_by'):
+            for order in reversed(query['_order_by'].split(',')):
+                (field, _, direction) = order.strip().partition(' ')
+                objects.sort(key=lambda o: (lookup(o, field) is None, str(lookup(o, field))),
+                             reverse=direction.strip().lower() == 'desc')
+        offset = int(query.get('_offset') or 0)
+        if query.get('_page_token'):
+            offset = int(base64.urlsafe_b64decode(query['_page_token'].encode()).decode())
+        limit = int(query['_limit']) if query.get('_limit') else len(objects)
+        page = objects[offset:offset + limit]
+        body = {'results': [fields(o, query) for o in page]}
+        if self.page_tokens and offset + limit < len(objects):
+            body['page_token'] = base64.urlsafe_b64encode(str(offset + limit).encode()).decode()
+        return body
+
+    def next_available(self, method, parent_id, action, query):
+        store = self.store
+        parent = store.get(parent_id)
+        count = int(query.get('count') or 1)
+        if action == 'nextavailableip':
+            network = ipaddress.ip_network('{}/{}'.format(parent['address'], parent['cidr']), strict=False)
+            used = store.used_addresses(parent.get('space'))
+            free = [str(a) for a in network.hosts() if str(a) not in used][:count]
+            return {'results': [{'address': a, 'space': parent.get('space')} for a in free]}
+        if action not in ('nextavailablesubnet', 'nextavailableaddressblock') or 'cidr' not in query:
+            raise MockError(400, 'Unsupported next available request')
+        obj_type = 'ipam/subnet' if action == 'nextavailablesubnet' else 'ipam/address_block'
+        block = ipaddress.ip_network('{}/{}'.format(parent['address'], parent['cidr']), strict=False)
+        taken = store.networks(obj_type, parent.get('space'))
+        if obj_type == 'ipam/address_block':
+            taken = [n for n in taken if n != block]
+        free = []
+        for candidate in block.subnets(new_prefix=int(query['cidr'])):
+            if not any(candidate.overlaps(n) for n in taken):
+                free.append(candidate)
+                if len(free) == count:
+                    break
+        if len(free) < count:
+            raise MockError(400, 'Not enough free space in {}'.format(parent_id))
+        if method == 'GET':
+            return {'results': [{'address': str(n.network_address), 'cidr': n.prefixlen} for n in free]}
+        created = []
+        for n in free:
+            obj = {'address': str(n.network_address), 'cidr': n.prefixlen, 'space': parent.get('space'),
+                   'parent': parent_id, 'name': query.get('name', ''), 'comment': query.get('comment', '')}
+            created.append(store.create(obj_type, obj))
+        return {'results': created}
+
+
+def fields(obj, query):
+    '''Returns the object trimmed to the _fields of the query
+    '''
+    if not query.get('_fields'):
+        return obj
+    names = [f.strip() for f in query['_fields'].split(',') if f.strip()]
+    return dict((k, v) for k, v in obj.items() if k in names)
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        '''HTTP/1.1 keep-alive handler of the mock API
+        '''
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes, which Nagle's algorithm
+        # would hold back for the client's delayed ACK
+        disable_nagle_algorithm = True
+
+        def _serve(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            url = urlparse(self.path)
+            query = dict((k, v[-1]) for k, v in parse_qs(url.query, keep_blank_values=True).items())
+            headers = {}
+            if server.latency or server.jitter:
+                time.sleep(server.latency + random.uniform(0, server.jitter))
+            try:
+                auth = self.headers.get('Authorization') or ''
+                if not auth.startswith('Token ') or (server.api_key and auth[6:] != server.api_key):
+                    raise MockError(401, 'Unauthorized')
+                injected = server.injected_error(self.command, url.path)
+                if injected:
+                    if injected[1] is not None:
+                        headers['Retry-After'] = str(injected[1])
+                    raise MockError(injected[0], 'Injected error')
+                try:
+                    payload = json.loads(raw.decode('utf-8')) if raw else None
+                except ValueError:
+                    raise MockError(400, 'Invalid JSON body')
+                (status, body) = server.dispatch(self.command, url.path, query, payload)
+            except MockError as e:
+                (status, body) = (e.status, {'error': [{'message': e.message}]})
+            out = json.dumps(body).encode('utf-8')
+            if self.command == 'GET' and status == 200:
+                # Validators of the listing, so clients can revalidate with If-None-Match
+                headers['ETag'] = '"{}"'.format(hashlib.sha1(out).hexdigest()[:20])
+                if self.headers.get('If-None-Match') == headers['ETag']:
+                    (status, out) = (304, b'')
+            if server.compress and len(out) >= 1024 and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                out = gzip.compress(out, 6)
+                headers['Content-Encoding'] = 'gzip'
+            # Counted before answering, so the client never reads stale stats
+            server.record(self.command, url.path, len(raw), len(out))
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(out)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(out)
+
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _serve
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock BloxOne DDI API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra seconds, up to this value')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with an error')
+    parser.add_argument('--error-status', type=int, action='append', help='status of the injected errors (503)')
+    parser.add_argument('--retry-after', type=int, help='Retry-After seconds sent with the injected errors')
+    parser.add_argument('--api-key', help='API token accepted by the server, any token when not set')
+    parser.add_argument('--page-tokens', action='store_true', help='page listings with page_token')
+    parser.add_argument('--seed', help='JSON file of {object type: [objects]} to preload')
+    parser.add_argument('--no-compression', action='store_true', help='never gzip the responses')
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                        args.error_status or (503,), args.retry_after, args.api_key, args.page_tokens,
+                        not args.no_compression)
+    if args.seed:
+        with open(args.seed) as f:
+            for obj_type, objects in json.load(f).items():
+                for obj in objects:
+                    server.add(obj_type, obj)
+    print('Serving the mock BloxOne API on {}'.format(server.url), flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2021 Infoblox, Inc.
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''Benchmark of large gather responses against the mock BloxOne API.
+
+The mock server is seeded with the given number of DNS records, which are then
+listed the way b1_a_record_gather does, once per JSON codec installed and per
+transfer encoding. The bytes on the wire, the wall time of the listing and the
+time spent decoding the JSON are printed and written as JSON::
+
+    python tools/payload_benchmark.py --records 50000 --latency 0.02 --output payload.json
+'''
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+COLLECTION_DIR = os.path.dirname(TOOLS_DIR)
+sys.path.insert(0, TOOLS_DIR)
+sys.path.insert(0, os.path.abspath(os.path.join(COLLECTION_DIR, '..', '..', '..')))
+
+from mock_server import MockServer
+
+ENDPOINT = '/api/ddi/v1/dns/record?_filter=type=="A"'
+
+
+def seed(server, records):
+    '''Adds a zone with the given number of A records, shaped like the API returns them
+    '''
+    view = server.add('dns/view', {'name': 'default'})
+    zone = server.add('dns/auth_zone', {'fqdn': 'example.com.', 'view': view['id'], 'primary_type': 'cloud'})
+    for i in range(records):
+        server.add('dns/record', {
+            'name_in_zone': 'host-{}'.format(i),
+            'absolute_name_spec': 'host-{}.example.com.'.format(i),
+            'absolute_zone_name': 'example.com.',
+            'zone': zone['id'],
+            'view': view['id'],
+            'view_name': 'default',
+            'type': 'A',
+            'rdata': {'address': '10.{}.{}.{}'.format(i >> 16 & 255, i >> 8 & 255, i & 255)},
+            'dns_rdata': '10.{}.{}.{}'.format(i >> 16 & 255, i >> 8 & 255, i & 255),
+            'ttl': 3600,
+            'inheritance_sources': {'ttl': {'action': 'inherit', 'source': zone['id'], 'value': 3600}},
+            'disabled': False,
+            'source': ['STATIC'],
+            'provider_metadata': {},
+            'options': {'create_ptr': False, 'check_rmz': False},
+            'tags': {'owner': 'netops', 'env': 'prod'},
+        })
+
+
+def measure(url, codec_name, encoding, page_size):
+    '''Lists the records with the given codec and Accept-Encoding, and returns
+    the wire bytes, the wall time and the decode time of the listing
+    '''
+    from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import Request, METRICS, JsonCodec
+
+    class TimedCodec(JsonCodec):
+        '''Codec adding up the time spent decoding the bodies of the listing
+        '''
+        decode_time = 0.0
+
+        def loads(self, data):
+            start = time.perf_counter()
+            try:
+                return super(TimedCodec, self).loads(data)
+            finally:
+                self.decode_time += time.perf_counter() - start
+
+    os.environ['B1DDI_METRICS'] = 'true'
+    METRICS.reset()
+    request = Request(url, 'benchmark')
+    request.codec = TimedCodec(codec_name)
+    request.session.headers['Accept-Encoding'] = encoding
+    start = time.perf_counter()
+    result = request.get_all(ENDPOINT, page_size)
+    wall_time = time.perf_counter() - start
+    summary = METRICS.summary()
+    return {
+        'codec': request.codec.name,
+        'encoding': encoding,
+        'objects': None if result[0] else len(result[2]['results']),
+        'http_calls': summary['calls'],
+        'bytes_on_wire': summary['bytes_received'],
+        'wall_time': round(wall_time, 4),
+        'decode_time': round(request.codec.decode_time, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark large listings per JSON codec and transfer encoding')
+    parser.add_argument('--records', type=int, default=50000, help='DNS records the mock server is seeded with')
+    parser.add_argument('--page-size', type=int, default=1000, help='objects per page of the listing')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every API response')
+    parser.add_argument('--output', default='payload_benchmark.json', help='JSON file the results are written to')
+    args = parser.parse_args()
+
+    from ansible_collections.infoblox.b1ddi_modules.plugins.module_utils.b1ddi import JsonCodec
+
+    codecs = [name for name in ('json', 'ujson', 'orjson') if JsonCodec(name).name == name]
+    # The response cache would turn the repeated listings into 304s
+    cache_dir = tempfile.mkdtemp(prefix='b1ddi-bench-')
+    os.environ['B1DDI_CACHE_DIR'] = cache_dir
+    os.environ['B1DDI_RESPONSE_CACHE_ENTRIES'] = '0'
+    results = []
+    try:
+        with MockServer(latency=args.latency) as server:
+            seed(server, args.records)
+            for encoding in ('identity', 'gzip, deflate'):
+                for codec in codecs:
+                    results.append(measure(server.url, codec, encoding, args.page_size))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'records': args.records,
+        'page_size': args.page_size,
+        'latency': args.latency,
+        'python': sys.version.split()[0],
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('{:<8} {:<14} {:>8} {:>6} {:>14} {:>11} {:>13}'.format(
+        'codec', 'encoding', 'objects', 'calls', 'bytes on wire', 'wall (ms)', 'decode (ms)'))
+    for r in results:
+        print('{codec:<8} {encoding:<14} {objects:>8} {http_calls:>6} {bytes_on_wire:>14} '
+              '{wall:>11.1f} {decode:>13.1f}'.format(wall=r['wall_time'] * 1000, decode=r['decode_time'] * 1000, **r))
+
+
+if __name__ == '__main__':
+    main()